@@ -0,0 +1,6 @@
+"""
+This package contain benchmarks for RKSOK server.
+Run them from root folder of project, for example:
+python -m benchmarks.microbench --compare
+python -m benchmarks.arenastorage
+"""
@@ -0,0 +1,71 @@
+"""
+This module compare memory used for one entry by ArenaRKSOKPhoneStorage and DictRKSOKPhoneStorage.
+For start it you should type next text in terminal (for example):
+python -m benchmarks.arenastorage --entries 100000
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import tracemalloc
+
+from rksokstorage import ArenaRKSOKPhoneStorage, DictRKSOKPhoneStorage, RKSOKPhoneStorage
+
+
+_NAMES = ("Иван", "Петр", "Николай", "Мария", "Анна", "Витя", "Коля", "Ольга")
+_SURNAMES = ("Иванов", "Петров", "Хмурый", "Сидорова", "Кузнецов", "Смирнова")
+
+
+def make_entries(count: int, seed: int = 0) -> list:
+    """Make list of pairs (name, phones) which look like real phone book entries."""
+    generator = random.Random(seed)
+    entries = []
+    for i in range(count):
+        name = f"{generator.choice(_NAMES)} {generator.choice(_SURNAMES)} {i}"
+        phones = "\r\n".join(
+            f"8-9{generator.randrange(10 ** 9):09d} — {generator.choice(('мобильный', 'рабочий', 'домашний'))}"
+            for _ in range(generator.randint(1, 3))
+        )
+        entries.append((name, phones))
+    return entries
+
+
+async def _fill_storage(storage: RKSOKPhoneStorage, entries) -> None:
+    for name, phones in entries:
+        await storage.set_data(name, phones)
+
+
+def measure_bytes_per_entry(storage_cls, entries: list) -> tuple:
+    """Return count of bytes allocated by storage for one entry and size of UTF-8 encoded entry."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        # Entries are decoded from network in real server, so storage gets its own copies of strings.
+        copies = [(name.encode("UTF-8").decode("UTF-8"), phones.encode("UTF-8").decode("UTF-8")) for name, phones in entries]
+        storage = storage_cls()
+        asyncio.run(_fill_storage(storage, copies))
+        del copies
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    payload = sum(len(name.encode("UTF-8")) + len(phones.encode("UTF-8")) for name, phones in entries)
+    return (after - before) / len(entries), payload / len(entries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000, help="count of entries in storage")
+    arguments = parser.parse_args()
+
+    entries = make_entries(arguments.entries)
+    print(f"entries: {arguments.entries}")
+    for storage_cls in (DictRKSOKPhoneStorage, ArenaRKSOKPhoneStorage):
+        bytes_per_entry, payload_per_entry = measure_bytes_per_entry(storage_cls, entries)
+        print(f"{storage_cls.__name__}: {bytes_per_entry:.1f} bytes per entry (payload {payload_per_entry:.1f} bytes)")
+
+
+if __name__ == "__main__":
+    main()
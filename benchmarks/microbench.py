@@ -0,0 +1,418 @@
+"""
+This module contain microbenchmarks for hot paths of RKSOK protocol and storages.
+For start it you should type next text in terminal (for example):
+python -m benchmarks.microbench                   - run benchmarks and print results
+python -m benchmarks.microbench --save            - run benchmarks and save results as baseline
+python -m benchmarks.microbench --compare         - run benchmarks and compare results with baseline
+python -m benchmarks.microbench --filter storage  - run only benchmarks which names contain "storage"
+Comparison exits with code 1 if some benchmark is slower than baseline more than threshold.
+Baseline is committed with time of calibration loop. Calibration loop is measured in every run
+and baseline results are scaled by it, so other speed of machine does not look like regression.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import timeit
+
+from pathlib import Path
+from typing import Callable, Dict
+
+# Server module reads its configuration on import, so benchmarks setup it without .env file.
+for _name, _value in {
+    "SERVER_HOST": "127.0.0.1",
+    "SERVER_PORT": "8000",
+    "VALIDATE_SERVER_HOST": "",
+    "VALIDATE_SERVER_PORT": "0",
+    "CLIENT_REQUEST_TIMEOUT": "7",
+    "SERVER_RESPONSE_TIMEOUT": "7",
+    "STORAGE_TYPE": "Dict",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from rksokprotocol import RKSOKCommand, ResponseStatus, _ENCODING
+from rksokstorage import DictRKSOKPhoneStorage, PostgreSQLRKSOKPhoneStorage, RKSOKPhoneStorage
+from rksokstoragemanager import RKSOKStorageManager
+from server import RKSOKPhoneBookServer, ServerParameters
+
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+CALIBRATION_NAME = "calibration"
+
+_BENCHMARKS: Dict[str, Callable] = {}
+
+
+def benchmark(name: str):
+    """
+    This decorator register benchmark.
+    Decorated function make setup and return operation for measure (function or coroutine function without parameters).
+    """
+    def register(func):
+        _BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def _phone_lines(count: int) -> str:
+    return "\r\n".join(f"8-9{i:09d} — рабочий телефон отдела {i}" for i in range(count))
+
+
+_GET_REQUEST = "ОТДОВАЙ Иван Хмурый РКСОК/1.0\r\n\r\n"
+_WRITE_REQUEST = f"ЗОПИШИ Иван Хмурый РКСОК/1.0\r\n{_phone_lines(3)}\r\n\r\n"
+_LARGE_WRITE_REQUEST = f"ЗОПИШИ Иван Хмурый РКСОК/1.0\r\n{_phone_lines(5000)}\r\n\r\n"
+
+
+@benchmark("protocol.parse.get")
+def _parse_get():
+    return lambda: RKSOKCommand.rksokcommand_from_str(_GET_REQUEST)
+
+
+@benchmark("protocol.parse.write")
+def _parse_write():
+    return lambda: RKSOKCommand.rksokcommand_from_str(_WRITE_REQUEST)
+
+
+@benchmark("protocol.parse.write_large")
+def _parse_write_large():
+    return lambda: RKSOKCommand.rksokcommand_from_str(_LARGE_WRITE_REQUEST)
+
+
+@benchmark("protocol.parse.incorrect")
+def _parse_incorrect():
+    return lambda: RKSOKCommand.rksokcommand_from_str("ОТДОВАЙ Иван Хмурый HTTP/1.1\r\n\r\n")
+
+
+@benchmark("protocol.serialize.notfound")
+def _serialize_notfound():
+    command = RKSOKCommand(ResponseStatus.NOTFOUND.value)
+    return lambda: str(command).encode(_ENCODING)
+
+
+@benchmark("protocol.serialize.ok")
+def _serialize_ok():
+    command = RKSOKCommand(ResponseStatus.OK.value, value=_phone_lines(3))
+    return lambda: str(command).encode(_ENCODING)
+
+
+@benchmark("protocol.serialize.ok_large")
+def _serialize_ok_large():
+    command = RKSOKCommand(ResponseStatus.OK.value, value=_phone_lines(5000))
+    return lambda: str(command).encode(_ENCODING)
+
+
+class _ChunkedReader:
+    """Stand-in for asyncio.StreamReader which return message by chunks of given size."""
+
+    def __init__(self, message: bytes, chunk_size: int) -> None:
+        self._chunks = [message[i:i + chunk_size] for i in range(0, len(message), chunk_size)]
+        self._position = 0
+
+    def rewind(self) -> "_ChunkedReader":
+        self._position = 0
+        return self
+
+    async def read(self, n: int = -1) -> bytes:
+        if self._position == len(self._chunks):
+            return b""
+        chunk = self._chunks[self._position]
+        self._position += 1
+        return chunk
+
+
+def _reader_benchmark(message: str, chunk_size: int):
+    server = RKSOKPhoneBookServer(ServerParameters("127.0.0.1", 8000), DictRKSOKPhoneStorage())
+    reader = _ChunkedReader(message.encode(_ENCODING), chunk_size)
+
+    async def operation():
+        await server._get_all_data_from_reader(reader.rewind())
+    return operation
+
+
+@benchmark("server.read.small")
+def _read_small():
+    return _reader_benchmark(_GET_REQUEST, 1024)
+
+
+@benchmark("server.read.large")
+def _read_large():
+    return _reader_benchmark(_LARGE_WRITE_REQUEST, 1024)
+
+
+@benchmark("server.read.large_fragmented")
+def _read_large_fragmented():
+    return _reader_benchmark(_LARGE_WRITE_REQUEST, 64)
+
+
+def _manager_benchmark(request: str):
+    storage = DictRKSOKPhoneStorage()
+    manager = RKSOKStorageManager(storage)
+    command = RKSOKCommand.rksokcommand_from_str(request)
+    asyncio.run(storage.set_data("Иван Хмурый", _phone_lines(3)))
+
+    async def operation():
+        await manager.get_response_for_request(command)
+    return operation
+
+
+@benchmark("manager.dispatch.get")
+def _manager_get():
+    return _manager_benchmark(_GET_REQUEST)
+
+
+@benchmark("manager.dispatch.write")
+def _manager_write():
+    return _manager_benchmark(_WRITE_REQUEST)
+
+
+@benchmark("manager.dispatch.search")
+def _manager_search():
+    return _manager_benchmark("ПОИЩИ Иван* РКСОК/1.0\r\n\r\n")
+
+
+@benchmark("manager.dispatch.incorrect")
+def _manager_incorrect():
+    return _manager_benchmark("НИПОНЯЛ РКСОК/1.0\r\n\r\n")
+
+
+class _StandInTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _StandInCursor:
+    def __init__(self, records: list) -> None:
+        self._records = records
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self._records:
+            yield record
+
+
+class _StandInConnection:
+    """
+    Local stand-in for asyncpg.Connection which keep table userphones in dict.
+    It understand only queries of PostgreSQLRKSOKPhoneStorage, so benchmark show cost of storage code without database.
+    """
+
+    def __init__(self, table: dict) -> None:
+        self._table = table
+
+    async def fetchrow(self, query: str, key: str):
+        if key not in self._table:
+            return None
+        return {"username": key, "phones": self._table[key]}
+
+    async def execute(self, query: str, key: str, *values):
+        if query.startswith("INSERT"):
+            self._table[key] = values[0]
+        elif query.startswith("DELETE"):
+            self._table.pop(key, None)
+
+    def cursor(self, query: str, *arguments):
+        if "LIKE" in query:
+            pattern, limit = arguments
+            prefix = pattern[:-1].replace("\\%", "%").replace("\\_", "_").replace("\\\\", "\\")
+            keys = sorted(key for key in self._table if key.startswith(prefix))[:limit]
+            return _StandInCursor([{"username": key, "phones": self._table[key]} for key in keys])
+        return _StandInCursor([{"username": key} for key in self._table])
+
+    def transaction(self):
+        return _StandInTransaction()
+
+    async def close(self):
+        pass
+
+
+def _make_storage(storage_type: str) -> RKSOKPhoneStorage:
+    """Make storage of type, storages which need external service get local stand-in for it."""
+    storage_cls = RKSOKPhoneStorage.get_cls_by_storage_type(storage_type)
+    if issubclass(storage_cls, PostgreSQLRKSOKPhoneStorage):
+        storage = storage_cls(user="", password="", database="", host="")
+        table = {}
+
+        async def connect():
+            return _StandInConnection(table)
+        storage._connect = connect
+        return storage
+    return storage_cls()
+
+
+def _storage_benchmark(storage_type: str, action: str):
+    storage = _make_storage(storage_type)
+    keys = [f"Иван {i}" for i in range(10000)]
+
+    async def fill():
+        for key in keys:
+            await storage.set_data(key, _phone_lines(2))
+    asyncio.run(fill())
+
+    counter = iter(range(sys.maxsize))
+    value = _phone_lines(2)
+
+    async def get_hit():
+        await storage.get_data(keys[next(counter) % len(keys)])
+
+    async def get_miss():
+        await storage.get_data("Петр Петров")
+
+    async def set_existing():
+        await storage.set_data(keys[next(counter) % len(keys)], value)
+
+    async def delete_and_set():
+        key = keys[next(counter) % len(keys)]
+        await storage.delete_data(key)
+        await storage.set_data(key, value)
+
+    async def search_prefix():
+        async for _ in storage.search_prefix("Иван 99", 20):
+            pass
+
+    return {
+        "get_hit": get_hit,
+        "get_miss": get_miss,
+        "set": set_existing,
+        "delete_set": delete_and_set,
+        "search_prefix": search_prefix,
+    }[action]
+
+
+for _storage_type in RKSOKPhoneStorage.get_storage_types():
+    for _action in ("get_hit", "get_miss", "set", "delete_set", "search_prefix"):
+        benchmark(f"storage.{_storage_type}.{_action}")(
+            lambda storage_type=_storage_type, action=_action: _storage_benchmark(storage_type, action)
+        )
+
+
+def measure(operation: Callable, min_time: float, repeat: int) -> float:
+    """
+    Measure operation.
+
+    Parameters:
+    operation (Callable) - function or coroutine function without parameters
+    min_time (float) - min seconds of one measurement
+    repeat (int) - count of measurements
+
+    Returns:
+    (float) - best seconds for one call of operation
+    """
+    if not asyncio.iscoroutinefunction(operation):
+        timer = timeit.Timer(operation)
+        number, _ = timer.autorange()
+        number = max(1, int(number * min_time / 0.2))
+        return min(timer.repeat(repeat=repeat, number=number)) / number
+
+    async def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await operation()
+        return time.perf_counter() - start
+
+    async def measure_async() -> float:
+        number = 1
+        while True:
+            elapsed = await run(number)
+            if elapsed >= min_time:
+                break
+            number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+        return min([elapsed] + [await run(number) for _ in range(repeat - 1)]) / number
+
+    return asyncio.run(measure_async())
+
+
+def _calibration_loop() -> None:
+    """Fixed pure Python work with str and dict, time of it shows speed of machine and interpreter."""
+    table = {}
+    for number in range(1000):
+        key = f"key {number}"
+        table[key] = key.upper()
+    "\r\n".join(table.values()).split("\r\n")
+
+
+def run_benchmarks(name_filter: str, min_time: float, repeat: int) -> Dict[str, float]:
+    # Calibration is measured in every run, else filtered results can not be compared with baseline.
+    results = {CALIBRATION_NAME: measure(_calibration_loop, min_time, repeat)}
+    for name, setup in _BENCHMARKS.items():
+        if name_filter and name_filter not in name:
+            continue
+        try:
+            operation = setup()
+        except NotImplementedError:
+            continue
+        try:
+            results[name] = measure(operation, min_time, repeat)
+        except NotImplementedError:
+            # Storage does not support operation (for example: search by prefix).
+            continue
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> list:
+    """
+    Print results with baseline and return names of benchmarks which are slower than baseline more than threshold.
+    Baseline is scaled by ratio of calibration times in results and in baseline.
+    """
+    scale = 1.0
+    if CALIBRATION_NAME in results and baseline.get(CALIBRATION_NAME):
+        scale = results[CALIBRATION_NAME] / baseline[CALIBRATION_NAME]
+        print(f"Machine speed against baseline: {1 / scale:.2f}x, baseline is scaled by {scale:.2f}\n")
+    regressions = []
+    print(f"{'benchmark':45} {'time, us':>12} {'baseline, us':>14} {'change':>9}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base is None or name == CALIBRATION_NAME:
+            print(f"{name:45} {seconds * 1e6:12.3f} {'-':>14} {'-':>9}")
+            continue
+        base *= scale
+        change = seconds / base - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:45} {seconds * 1e6:12.3f} {base * 1e6:14.3f} {change:+9.1%}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", action="store_true", help="save results as baseline")
+    parser.add_argument("--compare", action="store_true", help="compare results with baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="file with baseline results")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown against baseline (0.2 = 20%%)")
+    parser.add_argument("--filter", default="", help="run only benchmarks which names contain text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="min seconds of one measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="count of measurements for every benchmark")
+    arguments = parser.parse_args()
+
+    if arguments.compare and not arguments.baseline.exists():
+        print(f"No baseline in {arguments.baseline}, run with --save first")
+        return
+
+    results = run_benchmarks(arguments.filter, arguments.min_time, arguments.repeat)
+
+    baseline = {}
+    if arguments.compare:
+        baseline = json.loads(arguments.baseline.read_text(encoding=_ENCODING))
+    regressions = compare(results, baseline, arguments.threshold)
+
+    if arguments.save:
+        saved = json.loads(arguments.baseline.read_text(encoding=_ENCODING)) if arguments.baseline.exists() else {}
+        saved.update(results)
+        arguments.baseline.write_text(json.dumps(saved, ensure_ascii=False, indent=4, sort_keys=True) + "\n", encoding=_ENCODING)
+        print(f"\nBaseline saved to {arguments.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks are slower than baseline more than {arguments.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
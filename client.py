@@ -2,6 +2,8 @@
 This module allow you make some test with RKSOK server.
 For start it you should type next text in terminal (for example):
 python client.py 127.0.0.1 8000
+or for server on the same host which listen Unix domain socket:
+python client.py unix:/tmp/rksok.sock
 """
 
 import socket
@@ -36,6 +38,16 @@ HUMAN_READABLE_ANSWERS = {
             "телефон человека {name} {payload}",
         ResponseStatus.INCORRECT_REQUEST: "Сервер не смог понять запрос "
             "на удаление данных, который мы отправили"
+    },
+    RequestVerb.SEARCH: {
+        ResponseStatus.OK: "Найдены телефоны людей, чьи имена начинаются "
+            "с {name}:{payload}",
+        ResponseStatus.NOTFOUND: "Людей, чьи имена начинаются с {name}, "
+            "на сервере РКСОК не найдено",
+        ResponseStatus.NOT_APPROVED: "Органы проверки запретили тебе искать "
+            "телефоны людей по началу имени {name} {payload}",
+        ResponseStatus.INCORRECT_REQUEST: "Сервер не смог понять запрос "
+            "на поиск данных, который мы отправили"
     }
 }
 
@@ -43,15 +55,17 @@ HUMAN_READABLE_ANSWERS = {
 MODE_TO_VERB = {
     1: RequestVerb.GET,
     2: RequestVerb.WRITE,
-    3: RequestVerb.DELETE
+    3: RequestVerb.DELETE,
+    4: RequestVerb.SEARCH
 }
 
 
 class RKSOKPhoneBook:
     """Phonebook working with RKSOK server."""
 
-    def __init__(self, server: str, port: int):
+    def __init__(self, server: str, port: int, unix_socket_path: str = None):
         self._server, self._port = server, port
+        self._unix_socket_path = unix_socket_path
         self._conn = None
         self._name, self._phone, self._verb = None, None, None
         self._raw_request, self._raw_response = None, None
@@ -85,11 +99,24 @@ class RKSOKPhoneBook:
         request_body = self._get_request_body()
         self._raw_request = request_body.decode(_ENCODING)
         if not self._conn:
-            self._conn = socket.create_connection((self._server, self._port))
+            self._conn = self._connect()
         self._conn.sendall(request_body)
         self._raw_response = self._receive_response_body()
         return self._raw_response
 
+    def _connect(self) -> socket.socket:
+        """Opens connection to RKSOK server by Unix domain socket if it is
+        specified, otherwise by TCP"""
+        if self._unix_socket_path:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                conn.connect(self._unix_socket_path)
+            except OSError:
+                conn.close()
+                raise
+            return conn
+        return socket.create_connection((self._server, self._port))
+
     def _get_request_body(self) -> bytes:
         """Composes RKSOK request, returns it as bytes"""
         request = f"{self._verb.value} {self._name.strip()} {_PROTOCOL}\r\n"
@@ -105,6 +132,8 @@ class RKSOKPhoneBook:
         else:
             raise CanNotParseResponseError()
         response_payload = "".join(raw_response.split("\r\n")[1:])
+        if self._verb == RequestVerb.SEARCH and response_status == ResponseStatus.OK:
+            response_payload = "\n".join([""] + raw_response.strip().split("\r\n")[1:])
         if response_status == ResponseStatus.NOT_APPROVED:
             response_payload = f"\nКомментарий органов: {response_payload}"
         return HUMAN_READABLE_ANSWERS.get(self._verb).get(response_status) \
@@ -121,6 +150,14 @@ class RKSOKPhoneBook:
         return response.decode(_ENCODING)
 
 
+def get_unix_socket_path() -> Optional[str]:
+    """Returns path of Unix domain socket from command-line arguments
+    if it is specified as unix:PATH."""
+    if len(sys.argv) > 1 and sys.argv[1].startswith("unix:"):
+        return sys.argv[1][len("unix:"):]
+    return None
+
+
 def get_server_and_port() -> tuple[str, int]:
     """Returns Server and Port from command-line arguments."""
     try:
@@ -131,10 +168,11 @@ def get_server_and_port() -> tuple[str, int]:
 
 def get_mode() -> int:
     """Asks user for the required mode and returns it.
-    There is three modes in this RKSOK client:
+    There is four modes in this RKSOK client:
         1) get person's phone,
         2) save person's phone
-        3) delete person's phone."""
+        3) delete person's phone
+        4) find phones of persons by start of name."""
     while True:
         mode = input(
             "Ооо, привет!\n"
@@ -146,11 +184,12 @@ def get_mode() -> int:
             "1 — получить телефон по имени\n"
             "2 — записать телефон по имени\n"
             "3 — удалить информацию по имени\n"
+            "4 — найти телефоны по началу имени\n"
             "\n"
             "Введи цифру того варианта, который тебе нужен: ")
         try:
             mode = int(mode)
-            if not 0 < mode < 4:
+            if not 0 < mode < 5:
                 raise ValueError()
             break
         except ValueError:
@@ -167,18 +206,24 @@ def process_critical_exception(message: str):
 
 def run_client() -> None:
     """Asks all needed data from client and process his query."""
-    try:
-        server, port = get_server_and_port()
-    except NotSpecifiedIPOrPortError:
-        process_critical_exception(
-            "Упс! Меня запускать надо так:\n\n"
-            "python3.9 rksok_client.py SERVER PORT\n\n"
-            "где SERVER и PORT — это домен и порт РКСОР сервера, "
-            "к которому мы будем подключаться. Например:\n\n"
-            "python3.9 rksok_client.py my-rksok-server.ru 5555\n")
+    unix_socket_path = get_unix_socket_path()
+    server, port = None, None
+    if not unix_socket_path:
+        try:
+            server, port = get_server_and_port()
+        except NotSpecifiedIPOrPortError:
+            process_critical_exception(
+                "Упс! Меня запускать надо так:\n\n"
+                "python3.9 rksok_client.py SERVER PORT\n\n"
+                "где SERVER и PORT — это домен и порт РКСОР сервера, "
+                "к которому мы будем подключаться. Например:\n\n"
+                "python3.9 rksok_client.py my-rksok-server.ru 5555\n\n"
+                "Если сервер запущен на этом же компьютере и слушает "
+                "Unix-сокет, можно указать путь к нему:\n\n"
+                "python3.9 rksok_client.py unix:/tmp/rksok.sock\n")
 
     try:
-        client = RKSOKPhoneBook(server, port)
+        client = RKSOKPhoneBook(server, port, unix_socket_path)
     except ConnectionRefusedError:
         process_critical_exception("Не могу подключиться к указанному "
                 "серверу и порту")
@@ -1,4 +1,4 @@
-from typing import Hashable
+from typing import Hashable, List
 
 
 class ObjectSerializer:
@@ -17,6 +17,10 @@ class ObjectSerializer:
             raise ValueError(key)
         return object
 
+    def get_registered_keys(self) -> List[Hashable]:
+        """Get keys of all registered serializers."""
+        return list(self._objects)
+
 
 if __name__ == '__main__':
     pass
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+This module describe codecs for values in RKSOK phone storage.
+You can add you own codec.
+For it you should create inheritor class from ValueCodec class and register it in _SERIALIZER.
+"""
+
+import base64
+import logging
+import time
+import zlib
+
+from abc import ABC, abstractmethod
+from objectserializer import ObjectSerializer
+from rksokdeadline import Deadline
+from rksokoffload import RKSOKCommandOffloader
+from rksokstorage import RKSOKPhoneStorage
+from typing import AsyncIterator, ClassVar, Tuple, Union
+
+
+logger = logging.getLogger(__name__)
+
+_ENCODING = "UTF-8"
+# Stored values which start with marker are encoded: "<marker><codec name>:<payload>".
+# Values without marker were stored before codecs or are stored as is.
+_MARKER = "\x1bRKSOK:"
+_RAW_CODEC_NAME = "raw"
+
+
+class ValueCodec(ABC):
+    """
+    This abstract class describe codec for compress values in storage.
+    """
+
+    name: ClassVar[str]
+
+    @abstractmethod
+    def encode(self, data: bytes) -> bytes:
+        """
+        This function compress data.
+
+        Parameters:
+        data (bytes) - data for compress
+
+        Returns:
+        (bytes) - compressed data
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> bytes:
+        """
+        This function decompress data.
+
+        Parameters:
+        data (bytes) - compressed data
+
+        Returns:
+        (bytes) - data
+        """
+        pass
+
+    @staticmethod
+    def get_cls_by_codec_name(codec_name: str) -> object:
+        """
+        This function allow get specific Class by codec name.
+
+        Parameters:
+        codec_name (str) - name of codec (for example: "zlib")
+
+        Returns:
+        Class ValueCodec
+        """
+        return _SERIALIZER.get_serializer(codec_name)
+
+
+class ZlibValueCodec(ValueCodec):
+    """
+    This class is descendant for ValueCodec.
+    He compress values by zlib.
+    """
+
+    name = "zlib"
+
+    def __init__(self, level: int = 6) -> None:
+        """
+        Init codec parameters.
+
+        Parameters:
+        level (int = 6) - zlib compression level from 1 (fast) to 9 (small)
+        """
+        self._level = level
+
+    def encode(self, data: bytes) -> bytes:
+        return zlib.compress(data, self._level)
+
+    def decode(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+def _compress_value(codec: ValueCodec, data: bytes) -> Tuple[str, float]:
+    """Return compressed data in base64 and CPU time of compress (function can be run in pool)."""
+    start = time.thread_time()
+    payload = base64.b64encode(codec.encode(data)).decode("ascii")
+    return payload, time.thread_time() - start
+
+
+def _decompress_value(codec: ValueCodec, payload: str) -> Tuple[str, float]:
+    """Return value from compressed data in base64 and CPU time of decompress (function can be run in pool)."""
+    start = time.thread_time()
+    value = codec.decode(base64.b64decode(payload)).decode(_ENCODING)
+    return value, time.thread_time() - start
+
+
+class CodecRKSOKPhoneStorage(RKSOKPhoneStorage):
+    """
+    This class is descendant for RKSOKPhoneStorage.
+    He compress values bigger than threshold by codec before save them in other storage
+    and decompress them after get from other storage.
+    Values which were saved without codec are returned as is.
+    """
+
+    def __init__(self, storage: RKSOKPhoneStorage, codec: ValueCodec, threshold: int = 1024,
+                 offloader: RKSOKCommandOffloader = None) -> None:
+        """
+        Init parameters for storage.
+
+        Parameters:
+        storage (RKSOKPhoneStorage) - storage for save encoded values
+        codec (ValueCodec) - codec for compress values
+        threshold (int = 1024) - values with size in bytes less than threshold are saved without compress
+        offloader (RKSOKCommandOffloader = None) - runner of compress and decompress (by default they run in event loop)
+        """
+        super().__init__()
+        self._storage = storage
+        self._codec = codec
+        self._threshold = threshold
+        self._offloader = offloader if offloader is not None else RKSOKCommandOffloader(max_workers=0)
+        self._codecs = {codec.name: codec}
+        self._compressed_values = 0
+        self._raw_values = 0
+        self._original_bytes = 0
+        self._compressed_bytes = 0
+        self._encode_cpu_time = 0.0
+        self._decode_cpu_time = 0.0
+
+    async def get_data(self, key: str, deadline: Deadline = None) -> Union[str, None]:
+        value = await self._storage.get_data(key, deadline)
+        if value is None:
+            return None
+        if deadline is not None:
+            deadline.check("storage")
+        return await self._decode_value(value)
+
+    async def set_data(self, key: str, value: str, deadline: Deadline = None) -> bool:
+        if deadline is not None:
+            deadline.check("storage")
+        encoded_value = await self._encode_value(value)
+        if deadline is not None:
+            deadline.check("storage")
+        return await self._storage.set_data(key, encoded_value, deadline)
+
+    async def delete_data(self, key: str, deadline: Deadline = None) -> bool:
+        return await self._storage.delete_data(key, deadline)
+
+    def iter_keys(self) -> AsyncIterator[str]:
+        return self._storage.iter_keys()
+
+    async def search_prefix(self, prefix: str, limit: int, deadline: Deadline = None) -> AsyncIterator[Tuple[str, str]]:
+        async for key, value in self._storage.search_prefix(prefix, limit, deadline):
+            yield key, await self._decode_value(value)
+
+    async def defragment(self) -> None:
+        await self._storage.defragment()
+
+    def statistics(self) -> dict:
+        """Return information about compression of values and statistics of other storage."""
+        return {
+            "codec": self._codec.name,
+            "compressed_values": self._compressed_values,
+            "raw_values": self._raw_values,
+            "compression_ratio": self._original_bytes / self._compressed_bytes if self._compressed_bytes else None,
+            "encode_cpu_time": self._encode_cpu_time,
+            "decode_cpu_time": self._decode_cpu_time,
+            "storage": self._storage.statistics(),
+        }
+
+    async def _encode_value(self, value: str) -> str:
+        """Return value in format for save in storage."""
+        data = value.encode(_ENCODING)
+        if len(data) >= self._threshold:
+            payload, cpu_time = await self._offloader.run(_compress_value, self._codec, data, size=len(data))
+            self._encode_cpu_time += cpu_time
+            if len(payload) < len(data):
+                self._compressed_values += 1
+                self._original_bytes += len(data)
+                self._compressed_bytes += len(payload)
+                return f"{_MARKER}{self._codec.name}:{payload}"
+        self._raw_values += 1
+        if value.startswith(_MARKER):
+            # Value looks like encoded value, so mark it as raw for get it back as is.
+            return f"{_MARKER}{_RAW_CODEC_NAME}:{value}"
+        return value
+
+    async def _decode_value(self, value: str) -> str:
+        """
+        Return value from format in which it was saved in storage.
+        Value which can not be decoded (unknown codec, damaged payload) is written to log and returned as is.
+        """
+        if not value.startswith(_MARKER):
+            return value
+        codec_name, separator, payload = value[len(_MARKER):].partition(":")
+        if not separator:
+            logger.warning("Stored value has marker without codec name, value is returned as is")
+            return value
+        if codec_name == _RAW_CODEC_NAME:
+            return payload
+        codec = self._codecs.get(codec_name)
+        if codec is None:
+            try:
+                codec = self._codecs[codec_name] = ValueCodec.get_cls_by_codec_name(codec_name)()
+            except ValueError:
+                logger.warning("Stored value is encoded by unknown codec %r, value is returned as is", codec_name)
+                return value
+        try:
+            result, cpu_time = await self._offloader.run(_decompress_value, codec, payload, size=len(payload))
+        except Exception:
+            # Codecs are pluggable, so any error of decode means damaged value, not error of server.
+            logger.exception("Stored value can not be decoded by codec %r, value is returned as is", codec_name)
+            return value
+        self._decode_cpu_time += cpu_time
+        return result
+
+
+class ValueCodecSerializer(ObjectSerializer):
+    """
+    Class factory for ValueCodec
+    """
+    def __init__(self):
+        super().__init__()
+
+
+_SERIALIZER = ValueCodecSerializer()
+_SERIALIZER.register_format(ZlibValueCodec.name, ZlibValueCodec)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,77 @@
+"""
+This module describe deadline of RKSOK request.
+Deadline is created when request is accepted and is passed to every step of request handling,
+so step does not start if client already stopped waiting for response.
+"""
+
+import asyncio
+import inspect
+import time
+
+from rksokexception import DeadlineExceededError
+from typing import Awaitable
+
+
+class Deadline:
+    """
+    This class describe moment after which work for request is not needed.
+    """
+
+    def __init__(self, timeout: float) -> None:
+        """
+        Init Deadline parameters.
+
+        Parameters:
+        timeout (float) - seconds from now until deadline (for example: 2.5)
+        """
+        self._expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Return seconds until deadline (0 if deadline expired)."""
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self._expires_at
+
+    def timeout(self, limit: float = None) -> float:
+        """Return seconds until deadline, but not more than limit."""
+        if limit is None:
+            return self.remaining()
+        return min(limit, self.remaining())
+
+    def check(self, stage: str) -> None:
+        """
+        Check that deadline is not expired before start stage of work.
+
+        Parameters:
+        stage (str) - name of stage for statistics (for example: "storage")
+
+        Raises:
+        DeadlineExceededError - if deadline expired
+        """
+        if self.expired():
+            raise DeadlineExceededError(stage)
+
+    async def wait_for(self, awaitable: Awaitable, stage: str):
+        """
+        Wait awaitable until deadline.
+
+        Parameters:
+        awaitable (Awaitable) - work for stage
+        stage (str) - name of stage for statistics (for example: "storage")
+
+        Raises:
+        DeadlineExceededError - if deadline expired before or while work
+        """
+        if self.expired():
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceededError(stage)
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(stage)
+
+
+if __name__ == '__main__':
+    pass
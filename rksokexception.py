@@ -14,5 +14,12 @@ class CanNotParseRequestError(Exception):
     request from client."""
     pass
 
+class DeadlineExceededError(Exception):
+    """Error that occurs when deadline of client request expired
+    before work for request was finished."""
+    def __init__(self, stage: str):
+        super().__init__(stage)
+        self.stage = stage
+
 if __name__ == '__main__':
     pass
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+This module describe detection of hot keys in RKSOK requests.
+Counts are estimated by count-min sketch, so memory does not depend on count of different keys.
+"""
+
+import hashlib
+import time
+
+from array import array
+from typing import Dict, List, Tuple
+
+
+# Count of 64-bit words in the biggest blake2b digest.
+_WORDS_IN_DIGEST = 8
+
+class CountMinSketch:
+    """
+    This class describe count-min sketch for str keys.
+    Estimated count is never less than real count.
+    """
+
+    def __init__(self, width: int, depth: int) -> None:
+        """
+        Init CountMinSketch parameters.
+
+        Parameters:
+        width (int) - count of counters in every row
+        depth (int) - count of rows (hash functions)
+        """
+        if width <= 0 or depth <= 0:
+            raise ValueError("Width and depth must be positive.")
+        self._width = width
+        self._depth = depth
+        self._rows = [array("d", bytes(8 * width)) for _ in range(depth)]
+
+    def add(self, key: str, count: float = 1) -> float:
+        """Add count for key and return new estimated count of key."""
+        estimate = None
+        for row, position in zip(self._rows, self._positions(key)):
+            row[position] += count
+            if estimate is None or row[position] < estimate:
+                estimate = row[position]
+        return estimate
+
+    def estimate(self, key: str) -> float:
+        """Return estimated count of key."""
+        return min(row[position] for row, position in zip(self._rows, self._positions(key)))
+
+    def decay(self, factor: float) -> None:
+        """Multiply all counters by factor, so old requests weigh less than new."""
+        for row in self._rows:
+            for i in range(self._width):
+                row[i] *= factor
+
+    def size_in_bytes(self) -> int:
+        """Return memory size of counters."""
+        return self._width * self._depth * self._rows[0].itemsize
+
+    def _positions(self, key: str):
+        """
+        Return positions of counters for key.
+        Every row has its own 64-bit word of blake2b digest, so keys which share counter in one row
+        do not share counters in other rows more often than random keys.
+        """
+        encoded_key = key.encode("UTF-8")
+        for first_row in range(0, self._depth, _WORDS_IN_DIGEST):
+            words_count = min(_WORDS_IN_DIGEST, self._depth - first_row)
+            # Digest for every block of rows is personalized by number of first row, so blocks are independent too.
+            digest = hashlib.blake2b(encoded_key, digest_size=8 * words_count, person=first_row.to_bytes(16, "little")).digest()
+            for i in range(0, 8 * words_count, 8):
+                yield int.from_bytes(digest[i:i + 8], "little") % self._width
+
+
+class HeavyHitters:
+    """
+    This class keep top K keys by estimated count from count-min sketch.
+    """
+
+    def __init__(self, top_k: int, width: int, depth: int) -> None:
+        """
+        Init HeavyHitters parameters.
+
+        Parameters:
+        top_k (int) - count of keys in top
+        width (int) - width of count-min sketch
+        depth (int) - depth of count-min sketch
+        """
+        if top_k <= 0:
+            raise ValueError("Top K must be positive.")
+        self._top_k = top_k
+        self._sketch = CountMinSketch(width, depth)
+        self._top = {}
+
+    def add(self, key: str) -> None:
+        """Count key and update top."""
+        estimate = self._sketch.add(key)
+        if key in self._top or len(self._top) < self._top_k:
+            self._top[key] = estimate
+            return
+        min_key = min(self._top, key=self._top.get)
+        if estimate > self._top[min_key]:
+            del self._top[min_key]
+            self._top[key] = estimate
+
+    def decay(self, factor: float) -> None:
+        """Decay counts of sketch and top."""
+        self._sketch.decay(factor)
+        for key in self._top:
+            self._top[key] *= factor
+
+    def top(self) -> List[Tuple[str, int]]:
+        """Return top keys with estimated counts sorted by count."""
+        return sorted(((key, round(count)) for key, count in self._top.items()), key=lambda item: item[1], reverse=True)
+
+    def size_in_bytes(self) -> int:
+        return self._sketch.size_in_bytes()
+
+
+class RKSOKHotKeyTracker:
+    """
+    This class track hot keys for every request verb.
+    Every window counts are decayed, so top shows keys which dominate traffic now.
+    """
+
+    def __init__(self, top_k: int = 10, width: int = 2048, depth: int = 4, decay_interval: float = 60, decay_factor: float = 0.5) -> None:
+        """
+        Init RKSOKHotKeyTracker parameters.
+
+        Parameters:
+        top_k (int = 10) - count of keys in top for every verb
+        width (int = 2048) - width of count-min sketch for every verb
+        depth (int = 4) - depth of count-min sketch for every verb
+        decay_interval (float = 60) - seconds of window after which counts are decayed
+        decay_factor (float = 0.5) - multiplier for counts at the end of window
+        """
+        if decay_interval <= 0:
+            raise ValueError("Decay interval must be positive.")
+        if not 0 <= decay_factor < 1:
+            raise ValueError("Decay factor must be between 0 and 1.")
+        # Creating sketch validate parameters before server start.
+        HeavyHitters(top_k, width, depth)
+        self._top_k = top_k
+        self._width = width
+        self._depth = depth
+        self._decay_interval = decay_interval
+        self._decay_factor = decay_factor
+        self._heavy_hitters: Dict[str, HeavyHitters] = {}
+        self._last_decay = time.monotonic()
+
+    def record(self, verb: str, key: str) -> None:
+        """Count request with verb for key."""
+        self._decay_if_window_passed()
+        heavy_hitters = self._heavy_hitters.get(verb)
+        if heavy_hitters is None:
+            heavy_hitters = self._heavy_hitters[verb] = HeavyHitters(self._top_k, self._width, self._depth)
+        heavy_hitters.add(key)
+
+    def top_keys(self) -> Dict[str, List[Tuple[str, int]]]:
+        """Return current top keys with estimated counts for every verb."""
+        self._decay_if_window_passed()
+        return {verb: heavy_hitters.top() for verb, heavy_hitters in self._heavy_hitters.items()}
+
+    def size_in_bytes(self) -> int:
+        """Return memory size of all sketches."""
+        return sum(heavy_hitters.size_in_bytes() for heavy_hitters in self._heavy_hitters.values())
+
+    def _decay_if_window_passed(self) -> None:
+        now = time.monotonic()
+        windows_passed = int((now - self._last_decay) // self._decay_interval)
+        if windows_passed <= 0:
+            return
+        factor = self._decay_factor ** windows_passed
+        for heavy_hitters in self._heavy_hitters.values():
+            heavy_hitters.decay(factor)
+        self._last_decay += windows_passed * self._decay_interval
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,180 @@
+"""
+This module describe membership filter for keys in RKSOK phone storage.
+Filter allow answer НИНАШОЛ for keys which definitely not exist in storage without request to storage.
+"""
+
+import hashlib
+import logging
+import math
+
+from typing import Union
+
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    This class describe Bloom filter for str keys.
+    Filter can say that key definitely not added or that key probably added.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float, max_memory: int = None) -> None:
+        """
+        Init BloomFilter parameters.
+
+        Parameters:
+        capacity (int) - expected count of keys in filter
+        false_positive_rate (float) - expected part of false positive answers for filled filter (for example: 0.01)
+        max_memory (int = None) - limit of memory for filter in bytes
+        """
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive.")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("False positive rate must be between 0 and 1.")
+
+        bits_count = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        needed_bits_count = bits_count
+        if max_memory is not None:
+            if max_memory <= 0:
+                raise ValueError("Memory limit must be positive.")
+            bits_count = min(bits_count, max_memory * 8)
+
+        self._bits_count = max(bits_count, 8)
+        self._hashes_count = max(1, round(self._bits_count / capacity * math.log(2)))
+        self._bits = bytearray(math.ceil(self._bits_count / 8))
+        self._items_count = 0
+        if self._bits_count < needed_bits_count:
+            logger.warning(
+                "Memory limit %d bytes is less than %d bytes needed for %d keys, false positive rate will be %.3f instead of %.3f",
+                max_memory, math.ceil(needed_bits_count / 8), capacity,
+                self.estimated_false_positive_rate(capacity), false_positive_rate)
+
+    def add(self, key: str) -> None:
+        """Add key to filter."""
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._items_count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def __len__(self) -> int:
+        return self._items_count
+
+    def size_in_bytes(self) -> int:
+        """Return memory size of filter bits."""
+        return len(self._bits)
+
+    def estimated_false_positive_rate(self, items_count: int = None) -> float:
+        """
+        Return expected part of false positive answers.
+
+        Parameters:
+        items_count (int = None) - count of keys in filter (by default count of added keys)
+        """
+        if items_count is None:
+            items_count = self._items_count
+        return (1 - math.exp(-self._hashes_count * items_count / self._bits_count)) ** self._hashes_count
+
+    def _positions(self, key: str):
+        """Return positions of bits for key (double hashing by one blake2b digest)."""
+        digest = hashlib.blake2b(key.encode("UTF-8"), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], "little")
+        second_hash = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self._hashes_count):
+            yield (first_hash + i * second_hash) % self._bits_count
+
+
+class RKSOKKeyFilter:
+    """
+    This class keep Bloom filter for keys of RKSOK phone storage up to date.
+    Until first build is finished filter say that every key may exist.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float, max_memory: int = None) -> None:
+        """
+        Init RKSOKKeyFilter parameters.
+
+        Parameters:
+        capacity (int) - expected count of keys in storage
+        false_positive_rate (float) - target part of false positive answers
+        max_memory (int = None) - limit of memory for filter in bytes
+        """
+        self._capacity = capacity
+        self._false_positive_rate = false_positive_rate
+        self._max_memory = max_memory
+        # Creating filter validate parameters before server start.
+        BloomFilter(capacity, false_positive_rate, max_memory)
+        self._filter: Union[BloomFilter, None] = None
+        self._keys_added_while_rebuild: Union[set, None] = None
+        self._enabled = True
+
+    def might_contain(self, key: str) -> bool:
+        """
+        Check key in filter.
+
+        Returns:
+        False - if key definitely not exist in storage
+        True - if key may exist in storage or filter is not built
+        """
+        if self._filter is None:
+            return True
+        return key in self._filter
+
+    def add(self, key: str) -> None:
+        """Add written key to filter."""
+        if self._filter is not None:
+            self._filter.add(key)
+        if self._keys_added_while_rebuild is not None:
+            self._keys_added_while_rebuild.add(key)
+
+    def is_enabled(self) -> bool:
+        return self._enabled
+
+    async def rebuild(self, storage) -> None:
+        """
+        Build new filter by scan all keys in storage and replace current filter by it.
+        Deleted keys leave the filter only after rebuild.
+        If storage can not iterate keys filter will be disabled.
+
+        Parameters:
+        storage (RKSOKPhoneStorage) - storage for scan keys
+        """
+        if not self._enabled:
+            return
+
+        new_filter = BloomFilter(self._capacity, self._false_positive_rate, self._max_memory)
+        self._keys_added_while_rebuild = set()
+        try:
+            async for key in storage.iter_keys():
+                new_filter.add(key)
+        except NotImplementedError:
+            self._enabled = False
+            self._filter = None
+            return
+        finally:
+            keys_added_while_rebuild = self._keys_added_while_rebuild
+            self._keys_added_while_rebuild = None
+
+        for key in keys_added_while_rebuild:
+            new_filter.add(key)
+
+        if len(new_filter) > self._capacity:
+            self._capacity = len(new_filter) * 2
+        self._filter = new_filter
+
+    def statistics(self) -> dict:
+        """Return information about current filter."""
+        return {
+            "enabled": self._enabled,
+            "ready": self._filter is not None,
+            "capacity": self._capacity,
+            "keys": len(self._filter) if self._filter is not None else 0,
+            "size_in_bytes": self._filter.size_in_bytes() if self._filter is not None else 0,
+            "estimated_false_positive_rate": self._filter.estimated_false_positive_rate() if self._filter is not None else None,
+        }
+
+
+if __name__ == '__main__':
+    pass
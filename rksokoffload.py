@@ -0,0 +1,192 @@
+"""
+This module allow you move CPU-heavy work with RKSOK commands out of event loop
+and watch how long event loop is blocked.
+Parser of commands is written in pure Python and hold GIL, so only pool of processes really free event loop from it.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from rksokprotocol import RKSOKCommand, _ENCODING
+from typing import Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_command(request: str) -> RKSOKCommand:
+    return RKSOKCommand.rksokcommand_from_str(request)
+
+
+def _serialize_command(command: RKSOKCommand) -> bytes:
+    return str(command).encode(_ENCODING)
+
+
+def _decode_message(message: bytes) -> str:
+    return message.decode(_ENCODING)
+
+
+class RKSOKCommandOffloader:
+    """
+    This class parse and serialize RKSOKCommand and run other CPU-heavy work with commands.
+    Small jobs are handled right in event loop and timed, jobs bigger than threshold are handled in pool.
+    """
+
+    _executor_types = {
+        "thread": lambda max_workers: ThreadPoolExecutor(max_workers),
+        # Forked worker would keep copies of client sockets which are open at the moment,
+        # and clients would not get end of response after server close connection.
+        "process": lambda max_workers: ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn")),
+    }
+
+    def __init__(self, threshold: int = 64 * 1024, max_workers: int = 2, executor_type: str = "process", inline_budget: float = 0.05) -> None:
+        """
+        Init RKSOKCommandOffloader parameters.
+
+        Parameters:
+        threshold (int = 65536) - size of job in symbols or bytes from which job is handled in pool
+        max_workers (int = 2) - count of workers in pool (0 for handle all jobs in event loop)
+        executor_type (str = "process") - type of pool: "process" or "thread" (thread does not free event loop from pure Python work)
+        inline_budget (float = 0.05) - seconds of work in event loop after which warning is written to log
+        """
+        if executor_type not in self._executor_types:
+            raise ValueError(f"Unacceptable executor type {executor_type}.")
+        self._threshold = threshold
+        self._max_workers = max_workers
+        self._executor_type = executor_type
+        self._inline_budget = inline_budget
+        self._executor: Executor = None
+        self._workers: asyncio.Semaphore = None
+        self._offloaded = 0
+        self._inline = 0
+        self._inline_over_budget = 0
+
+    async def parse(self, request: str) -> RKSOKCommand:
+        """
+        Make RKSOKCommand from str.
+
+        Parameters:
+        request (str) - rksok command in str format
+
+        Returns:
+        (RKSOKCommand)
+        """
+        return await self.run(_parse_command, request, size=len(request))
+
+    async def serialize(self, command: RKSOKCommand) -> bytes:
+        """
+        Make bytes for send from RKSOKCommand.
+
+        Parameters:
+        command (RKSOKCommand) - command for send
+
+        Returns:
+        (bytes) - encoded command
+        """
+        return await self.run(_serialize_command, command, size=len(command.value() or ""))
+
+    async def decode(self, message: bytes) -> str:
+        """
+        Make str from received bytes.
+
+        Parameters:
+        message (bytes) - received bytes
+
+        Returns:
+        (str) - decoded message
+        """
+        return await self.run(_decode_message, message, size=len(message))
+
+    def shutdown(self) -> None:
+        """Stop pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def statistics(self) -> dict:
+        """Return count of jobs handled in pool and in event loop."""
+        return {
+            "offloaded": self._offloaded,
+            "inline": self._inline,
+            "inline_over_budget": self._inline_over_budget,
+        }
+
+    async def run(self, func: Callable, *arguments, size: int):
+        """
+        Run func with arguments in event loop or in pool by size of job.
+        For pool of processes func and arguments must be picklable (func must be defined on module level).
+
+        Parameters:
+        func (Callable) - function for run
+        arguments - arguments for func
+        size (int) - size of job in symbols or bytes
+
+        Returns:
+        result of func
+        """
+        if self._max_workers <= 0 or size < self._threshold:
+            return self._run_inline(func, arguments, size)
+
+        if self._workers is None:
+            # Bound count of jobs in pool, other big commands wait in event loop without take memory of pool queue.
+            self._workers = asyncio.Semaphore(self._max_workers)
+        async with self._workers:
+            if self._executor is None:
+                self._executor = self._executor_types[self._executor_type](self._max_workers)
+            self._offloaded += 1
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *arguments)
+
+    def _run_inline(self, func: Callable, arguments: tuple, size: int):
+        start = time.perf_counter()
+        result = func(*arguments)
+        elapsed = time.perf_counter() - start
+        self._inline += 1
+        if elapsed > self._inline_budget:
+            self._inline_over_budget += 1
+            logger.warning("%s with size %d blocked event loop for %.3f s", func.__name__.strip("_"), size, elapsed)
+        return result
+
+
+class LoopLagMonitor:
+    """
+    This class measure how late event loop wakes up sleeping task.
+    Big lag means that some work blocks event loop and all connections wait for it.
+    """
+
+    def __init__(self, interval: float = 0.5, budget: float = 0.05) -> None:
+        """
+        Init LoopLagMonitor parameters.
+
+        Parameters:
+        interval (float = 0.5) - seconds between checks
+        budget (float = 0.05) - seconds of lag after which warning is written to log
+        """
+        self._interval = interval
+        self._budget = budget
+        self._max_lag = 0.0
+        self._over_budget = 0
+
+    async def run(self) -> None:
+        """Check lag of event loop without limit by time."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self._interval)
+            lag = time.monotonic() - start - self._interval
+            self._max_lag = max(self._max_lag, lag)
+            if lag > self._budget:
+                self._over_budget += 1
+                logger.warning("Event loop was blocked for %.3f s (budget %.3f s)", lag, self._budget)
+
+    def statistics(self) -> dict:
+        """Return max lag and count of checks with lag bigger than budget."""
+        return {
+            "max_lag": self._max_lag,
+            "over_budget": self._over_budget,
+        }
+
+
+if __name__ == '__main__':
+    pass
@@ -16,6 +16,7 @@ class RequestVerb(Enum):
     DELETE = "УДОЛИ"
     WRITE = "ЗОПИШИ"
     CAN = "АМОЖНА?"
+    SEARCH = "ПОИЩИ"
 
 
 class ResponseStatus(Enum):
@@ -4,11 +4,14 @@ You can add you own storage type.
 For it you should create inheritor class from RKSOKPhoneStorage class.
 """
 
+import asyncio
 import asyncpg
 
 from abc import ABC, abstractmethod
+from array import array
 from objectserializer import ObjectSerializer
-from typing import Union
+from rksokdeadline import Deadline
+from typing import AsyncIterator, Callable, Sequence, Tuple, Union
 
 
 class RKSOKPhoneStorage(ABC):
@@ -17,12 +20,13 @@ class RKSOKPhoneStorage(ABC):
     """
 
     @abstractmethod
-    async def get_data(self, key: str) -> Union[str, None]:
+    async def get_data(self, key: str, deadline: Deadline = None) -> Union[str, None]:
         """
         This function allow get data from storage.
 
         Parameters:
         key (str) - key value for search info on storage.
+        deadline (Deadline = None) - deadline of client request, DeadlineExceededError is raised after it.
 
         Returns:
         data (str) - return data for key in str format if them exists
@@ -31,13 +35,14 @@ class RKSOKPhoneStorage(ABC):
         pass
 
     @abstractmethod
-    async def set_data(self, key: str, value: str) -> bool:
+    async def set_data(self, key: str, value: str, deadline: Deadline = None) -> bool:
         """
         This function allow set data in storage.
 
         Parameters:
         key (str) - key value for set data.
         value (str) - value for key.
+        deadline (Deadline = None) - deadline of client request, DeadlineExceededError is raised after it.
 
         Returns:
         True - if set was finished saccess
@@ -46,12 +51,13 @@ class RKSOKPhoneStorage(ABC):
         pass
 
     @abstractmethod
-    async def delete_data(self, key: str) -> bool:
+    async def delete_data(self, key: str, deadline: Deadline = None) -> bool:
         """
         This function allow delete data from storage.
 
         Parameters:
         key (str) - key value for delete info from storage.
+        deadline (Deadline = None) - deadline of client request, DeadlineExceededError is raised after it.
 
         Returns:
         True - if delete was finished saccess
@@ -59,6 +65,51 @@ class RKSOKPhoneStorage(ABC):
         """
         pass
 
+    def iter_keys(self) -> AsyncIterator[str]:
+        """
+        This function allow iterate all keys in storage without load them in memory at once.
+        Storage may not support it.
+
+        Returns:
+        (AsyncIterator[str]) - keys from storage
+
+        Raises:
+        NotImplementedError - if storage does not support iteration by keys
+        """
+        raise NotImplementedError("Storage does not support iteration by keys.")
+
+    def search_prefix(self, prefix: str, limit: int, deadline: Deadline = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        This function allow iterate data for keys which start with prefix in order of keys.
+        Data is produced one by one, so big result is not loaded in memory at once.
+        Storage may not support it.
+
+        Parameters:
+        prefix (str) - start of keys (for example: "Иван")
+        limit (int) - max count of results
+        deadline (Deadline = None) - deadline of client request, DeadlineExceededError is raised after it.
+
+        Returns:
+        (AsyncIterator[Tuple[str, str]]) - keys and data for them
+
+        Raises:
+        NotImplementedError - if storage does not support search by prefix
+        """
+        raise NotImplementedError("Storage does not support search by prefix.")
+
+    async def defragment(self) -> None:
+        """
+        This function allow storage compact memory which was released by deleted and rewritten data.
+        Storage may not need it.
+        """
+        pass
+
+    def statistics(self) -> dict:
+        """
+        This function return information about storage for log.
+        """
+        return {}
+
     @staticmethod
     def get_cls_by_storage_type(storage_type: str) -> object:
         """
@@ -72,20 +123,360 @@ class RKSOKPhoneStorage(ABC):
         """
         return _SERIALIZER.get_serializer(storage_type)
 
+    @staticmethod
+    def get_storage_types() -> list:
+        """
+        This function return all registered storage types.
+
+        Returns:
+        (list) - storage types (for example: ["Dict", "PostgreSQL"])
+        """
+        return _SERIALIZER.get_registered_keys()
+
+
+def _bisect(sequence: Sequence, target, key: Callable = None, right: bool = False) -> int:
+    """
+    Find position for target in sorted sequence.
+
+    Parameters:
+    sequence (Sequence) - sorted sequence
+    target - value for search, comparable with key of items
+    key (Callable = None) - function which return value for compare from item of sequence
+    right (bool = False) - return position after items equal to target instead of position before them
+
+    Returns:
+    (int) - position for insert target with keeping order
+    """
+    low, high = 0, len(sequence)
+    while low < high:
+        middle = (low + high) // 2
+        item = sequence[middle] if key is None else key(sequence[middle])
+        if item < target or (right and item == target):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+# Count of keys which in-memory storages give by iter_keys before return control to event loop.
+_ITER_KEYS_CHUNK = 1024
+
 
 class DictRKSOKPhoneStorage(RKSOKPhoneStorage):
+    """
+    This class is descendant for RKSOKPhoneStorage.
+    He allow work with data in memory of server process.
+    Sorted list of keys is kept for search by prefix.
+    """
+
     def __init__(self) -> None:
         super().__init__()
         self.storage = {}
+        self._sorted_keys = []
+
+    async def get_data(self, key: str, deadline: Deadline = None) -> Union[str, None]:
+        if deadline is not None:
+            deadline.check("storage")
+        return self.storage.get(key)
+
+    async def set_data(self, key: str, value: str, deadline: Deadline = None) -> bool:
+        if deadline is not None:
+            deadline.check("storage")
+        if key not in self.storage:
+            self._sorted_keys.insert(_bisect(self._sorted_keys, key), key)
+        self.storage[key] = value
+        return True
+
+    async def delete_data(self, key: str, deadline: Deadline = None) -> bool:
+        if deadline is not None:
+            deadline.check("storage")
+        if self.storage.pop(key, None) is None:
+            return False
+        del self._sorted_keys[_bisect(self._sorted_keys, key)]
+        return True
+
+    async def iter_keys(self) -> AsyncIterator[str]:
+        for number, key in enumerate(list(self.storage), 1):
+            yield key
+            if number % _ITER_KEYS_CHUNK == 0:
+                await asyncio.sleep(0)
+
+    async def search_prefix(self, prefix: str, limit: int, deadline: Deadline = None) -> AsyncIterator[Tuple[str, str]]:
+        position = _bisect(self._sorted_keys, prefix)
+        found = 0
+        while found < limit and position < len(self._sorted_keys):
+            if deadline is not None:
+                deadline.check("storage")
+            key = self._sorted_keys[position]
+            if not key.startswith(prefix):
+                break
+            yield key, self.storage[key]
+            found += 1
+            # Keys can be changed while result is consumed, so position is found again after last key.
+            position = _bisect(self._sorted_keys, key, right=True)
+
+
+_EMPTY_ENTRY = 0
+_DELETED_ENTRY = -1
+_FREE_SLOT = 0xFFFFFFFF
+# Count of slots which defragment scan before return control to event loop.
+_DEFRAGMENT_SCAN_CHUNK = 16384
+
+
+class ArenaRKSOKPhoneStorage(RKSOKPhoneStorage):
+    """
+    This class is descendant for RKSOKPhoneStorage.
+    He allow work with data in memory of server process and keep it compact.
+    Key and value of every entry are stored UTF-8 encoded one after another in big bytearray arenas.
+    Entry is described by slot: arena number, offset and lengths in arrays.
+    Slots are found by open addressing hash table which is array too, so no Python object is kept for entry.
+    Array of slots sorted by keys is kept for search by prefix.
+    """
+
+    def __init__(self, arena_size: int = 1024 * 1024, defragment_threshold: float = 0.5) -> None:
+        """
+        Init parameters for storage.
+
+        Parameters:
+        arena_size (int = 1048576) - size of one arena in bytes (bigger entries get own arena)
+        defragment_threshold (float = 0.5) - part of released bytes in arena after which arena will be compacted
+        """
+        super().__init__()
+        if arena_size <= 0:
+            raise ValueError("Arena size must be positive.")
+        self._arena_size = arena_size
+        self._defragment_threshold = defragment_threshold
+        self._table = array("i", bytes(4 * 8))
+        self._table_used = 0
+        self._keys_count = 0
+        self._free_slots = array("I")
+        self._sorted_slots = array("I")
+        self._slot_hash = array("I")
+        self._slot_arena = array("I")
+        self._slot_offset = array("I")
+        self._slot_key_length = array("H")
+        self._slot_value_length = array("I")
+        self._arenas = []
+        self._arena_used = array("I")
+        self._arena_released = array("I")
+        self._current_arena = None
+
+    async def get_data(self, key: str, deadline: Deadline = None) -> Union[str, None]:
+        if deadline is not None:
+            deadline.check("storage")
+        _, slot = self._lookup(key.encode("UTF-8"), hash(key) & 0xFFFFFFFF)
+        if slot is None:
+            return None
+        return self._slot_value(slot).decode("UTF-8")
+
+    async def set_data(self, key: str, value: str, deadline: Deadline = None) -> bool:
+        if deadline is not None:
+            deadline.check("storage")
+        encoded_key = key.encode("UTF-8")
+        if len(encoded_key) > 0xFFFF:
+            raise ValueError("Key to long.")
+        key_hash = hash(key) & 0xFFFFFFFF
+        record = encoded_key + value.encode("UTF-8")
+
+        position, slot = self._lookup(encoded_key, key_hash)
+        new_key = slot is None
+        if new_key:
+            slot = self._allocate_slot()
+            self._slot_hash[slot] = key_hash
+            self._slot_key_length[slot] = len(encoded_key)
+            if self._table[position] == _EMPTY_ENTRY:
+                self._table_used += 1
+            self._table[position] = slot + 1
+            self._keys_count += 1
+        else:
+            self._release_record(slot)
+
+        arena_number, offset = self._allocate_record(len(record))
+        self._arenas[arena_number][offset:offset + len(record)] = record
+        self._slot_arena[slot] = arena_number
+        self._slot_offset[slot] = offset
+        self._slot_value_length[slot] = len(record) - len(encoded_key)
+        if new_key:
+            self._sorted_slots.insert(_bisect(self._sorted_slots, encoded_key, key=self._slot_key), slot)
+
+        if self._table_used * 10 > len(self._table) * 7:
+            self._resize_table()
+        return True
 
-    async def get_data(self, key: str) -> str:
-        print(f'get dict data {key}')
+    async def delete_data(self, key: str, deadline: Deadline = None) -> bool:
+        if deadline is not None:
+            deadline.check("storage")
+        position, slot = self._lookup(key.encode("UTF-8"), hash(key) & 0xFFFFFFFF)
+        if slot is None:
+            return False
+        self._table[position] = _DELETED_ENTRY
+        del self._sorted_slots[_bisect(self._sorted_slots, self._slot_key(slot), key=self._slot_key)]
+        self._release_record(slot)
+        self._slot_arena[slot] = _FREE_SLOT
+        self._free_slots.append(slot)
+        self._keys_count -= 1
+        return True
 
-    async def set_data(self, key: str, value: str) -> None:
-        print(f'set dict data {key}, {value}')
+    async def iter_keys(self) -> AsyncIterator[str]:
+        for slot in range(len(self._slot_arena)):
+            if self._slot_arena[slot] != _FREE_SLOT:
+                yield self._slot_key(slot).decode("UTF-8")
+            if (slot + 1) % _ITER_KEYS_CHUNK == 0:
+                await asyncio.sleep(0)
+
+    async def search_prefix(self, prefix: str, limit: int, deadline: Deadline = None) -> AsyncIterator[Tuple[str, str]]:
+        encoded_prefix = prefix.encode("UTF-8")
+        position = _bisect(self._sorted_slots, encoded_prefix, key=self._slot_key)
+        found = 0
+        while found < limit and position < len(self._sorted_slots):
+            if deadline is not None:
+                deadline.check("storage")
+            slot = self._sorted_slots[position]
+            encoded_key = bytes(self._slot_key(slot))
+            if not encoded_key.startswith(encoded_prefix):
+                break
+            yield encoded_key.decode("UTF-8"), self._slot_value(slot).decode("UTF-8")
+            found += 1
+            # Keys can be changed while result is consumed, so position is found again after last key.
+            position = _bisect(self._sorted_slots, encoded_key, key=self._slot_key, right=True)
+
+    async def defragment(self) -> None:
+        """
+        Compact arenas where part of released bytes is bigger than defragment threshold.
+        Slots are scanned by chunks and control is returned to event loop after every chunk and every arena.
+        Arena which was changed by requests while slots were scanned is skipped till next defragment.
+        """
+        arenas_state = {
+            arena_number: (self._arena_used[arena_number], self._arena_released[arena_number])
+            for arena_number in range(len(self._arenas))
+            if self._arena_used[arena_number]
+            and self._arena_released[arena_number] / self._arena_used[arena_number] >= self._defragment_threshold
+        }
+        if not arenas_state:
+            return
+
+        live_slots = {arena_number: [] for arena_number in arenas_state}
+        slots_count = len(self._slot_arena)
+        for chunk_start in range(0, slots_count, _DEFRAGMENT_SCAN_CHUNK):
+            for slot in range(chunk_start, min(chunk_start + _DEFRAGMENT_SCAN_CHUNK, slots_count)):
+                slots = live_slots.get(self._slot_arena[slot])
+                if slots is not None:
+                    slots.append(slot)
+            await asyncio.sleep(0)
+
+        for arena_number, slots in live_slots.items():
+            # Every write and delete in arena change its used or released bytes,
+            # so unchanged state means that list of live slots is still exact.
+            if (self._arena_used[arena_number], self._arena_released[arena_number]) != arenas_state[arena_number]:
+                continue
+            self._compact_arena(arena_number, slots)
+            await asyncio.sleep(0)
+
+    def statistics(self) -> dict:
+        """Return information about memory used by storage."""
+        index_arrays = (self._table, self._free_slots, self._sorted_slots, self._slot_hash, self._slot_arena,
+                        self._slot_offset, self._slot_key_length, self._slot_value_length)
+        return {
+            "keys": self._keys_count,
+            "arenas": len(self._arenas),
+            "arenas_bytes": sum(len(arena) for arena in self._arenas),
+            "used_bytes": sum(self._arena_used),
+            "released_bytes": sum(self._arena_released),
+            "index_bytes": sum(len(index_array) * index_array.itemsize for index_array in index_arrays),
+        }
+
+    def _slot_key(self, slot: int) -> bytearray:
+        offset = self._slot_offset[slot]
+        return self._arenas[self._slot_arena[slot]][offset:offset + self._slot_key_length[slot]]
+
+    def _slot_value(self, slot: int) -> bytearray:
+        offset = self._slot_offset[slot] + self._slot_key_length[slot]
+        return self._arenas[self._slot_arena[slot]][offset:offset + self._slot_value_length[slot]]
+
+    def _lookup(self, encoded_key: bytes, key_hash: int) -> tuple:
+        """
+        Find key in hash table.
 
-    async def delete_data(self, key: str):
-        print(f'delete dict data {key}')
+        Returns:
+        (position, slot) - position of key in table and slot of key
+        (position, None) - if key not found, position is place for insert key
+        """
+        mask = len(self._table) - 1
+        position = key_hash & mask
+        insert_position = None
+        while True:
+            entry = self._table[position]
+            if entry == _EMPTY_ENTRY:
+                return (position if insert_position is None else insert_position), None
+            if entry == _DELETED_ENTRY:
+                if insert_position is None:
+                    insert_position = position
+            else:
+                slot = entry - 1
+                if self._slot_hash[slot] == key_hash and self._slot_key(slot) == encoded_key:
+                    return position, slot
+            position = (position + 1) & mask
+
+    def _resize_table(self) -> None:
+        """Make table with place for twice more keys and without deleted entries."""
+        size = 8
+        while size * 7 <= self._keys_count * 20:
+            size *= 2
+        table = array("i", bytes(4 * size))
+        mask = size - 1
+        for entry in self._table:
+            if entry > 0:
+                position = self._slot_hash[entry - 1] & mask
+                while table[position] != _EMPTY_ENTRY:
+                    position = (position + 1) & mask
+                table[position] = entry
+        self._table = table
+        self._table_used = self._keys_count
+
+    def _allocate_slot(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+        for slot_array in (self._slot_hash, self._slot_arena, self._slot_offset, self._slot_key_length, self._slot_value_length):
+            slot_array.append(0)
+        return len(self._slot_arena) - 1
+
+    def _allocate_record(self, length: int) -> tuple:
+        """Find place for record with length in arenas and return arena number and offset."""
+        arena_number = self._current_arena
+        if arena_number is None or len(self._arenas[arena_number]) - self._arena_used[arena_number] < length:
+            # Current arena is full, so look for space released by defragmentation before create new arena.
+            for arena_number in range(len(self._arenas)):
+                if len(self._arenas[arena_number]) - self._arena_used[arena_number] >= length:
+                    break
+            else:
+                self._arenas.append(bytearray(max(self._arena_size, length)))
+                self._arena_used.append(0)
+                self._arena_released.append(0)
+                arena_number = len(self._arenas) - 1
+            self._current_arena = arena_number
+        offset = self._arena_used[arena_number]
+        self._arena_used[arena_number] += length
+        return arena_number, offset
+
+    def _release_record(self, slot: int) -> None:
+        self._arena_released[self._slot_arena[slot]] += self._slot_key_length[slot] + self._slot_value_length[slot]
+
+    def _compact_arena(self, arena_number: int, slots: list) -> None:
+        """Move live records of arena to its beginning, so released bytes can be used again."""
+        arena = self._arenas[arena_number]
+        offset = 0
+        for slot in sorted(slots, key=self._slot_offset.__getitem__):
+            length = self._slot_key_length[slot] + self._slot_value_length[slot]
+            old_offset = self._slot_offset[slot]
+            if old_offset != offset:
+                arena[offset:offset + length] = arena[old_offset:old_offset + length]
+                self._slot_offset[slot] = offset
+            offset += length
+        if len(arena) > self._arena_size and offset <= self._arena_size:
+            # Arena for one big record is not needed any more in its full size.
+            self._arenas[arena_number] = arena[:self._arena_size] if offset else bytearray(self._arena_size)
+        self._arena_used[arena_number] = offset
+        self._arena_released[arena_number] = 0
 
 
 def _connection(func):
@@ -93,12 +484,13 @@ def _connection(func):
     This decorator create connection with database for methods in PostgreSQLRKSOKPhoneStorage class.
     """
     async def with_connection(self, *args, **kwargs):
-        conn = await asyncpg.connect(user=self._user, password=self._password, database=self._database, host=self._host)
+        conn = await self._connect()
         parameters = list(args)
         parameters.append(conn)
-        result = await func(self, *parameters, **kwargs)
-        await conn.close()
-        return result
+        try:
+            return await func(self, *parameters, **kwargs)
+        finally:
+            await conn.close()
         
     return with_connection
 
@@ -125,14 +517,46 @@ class PostgreSQLRKSOKPhoneStorage(RKSOKPhoneStorage):
         self._database = database
         self._host = host
 
-    async def get_data(self, key: str) -> str:
-        return await self._get_data_with_connection(key)
+    async def get_data(self, key: str, deadline: Deadline = None) -> str:
+        return await self._with_deadline(self._get_data_with_connection(key), deadline)
 
-    async def set_data(self, key: str, value: str) -> bool:
-        return await self._set_data_with_connection(key, value)
+    async def set_data(self, key: str, value: str, deadline: Deadline = None) -> bool:
+        return await self._with_deadline(self._set_data_with_connection(key, value), deadline)
 
-    async def delete_data(self, key: str) -> bool:
-        return await self._delete_data_with_connection(key)
+    async def delete_data(self, key: str, deadline: Deadline = None) -> bool:
+        return await self._with_deadline(self._delete_data_with_connection(key), deadline)
+
+    @staticmethod
+    async def _with_deadline(coroutine, deadline: Union[Deadline, None]):
+        """Cancel work with database (connection is closed) if deadline of client request expired."""
+        if deadline is None:
+            return await coroutine
+        return await deadline.wait_for(coroutine, "storage")
+
+    async def iter_keys(self) -> AsyncIterator[str]:
+        conn = await self._connect()
+        try:
+            async with conn.transaction():
+                async for record in conn.cursor('SELECT username FROM userphones'):
+                    yield record["username"]
+        finally:
+            await conn.close()
+
+    async def search_prefix(self, prefix: str, limit: int, deadline: Deadline = None) -> AsyncIterator[Tuple[str, str]]:
+        # Prefix is escaped for LIKE, so query can use index with varchar_pattern_ops (see SQLscripts.txt).
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conn = await self._connect() if deadline is None else await deadline.wait_for(self._connect(), "storage")
+        try:
+            async with conn.transaction():
+                async for record in conn.cursor('SELECT username, phones FROM userphones WHERE username LIKE $1 ORDER BY username LIMIT $2', pattern, limit):
+                    if deadline is not None:
+                        deadline.check("storage")
+                    yield record["username"], record["phones"]
+        finally:
+            await conn.close()
+
+    async def _connect(self) -> asyncpg.Connection:
+        return await asyncpg.connect(user=self._user, password=self._password, database=self._database, host=self._host)
 
     async def _select_data_by_key(self, conn: asyncpg.Connection, key: str) -> asyncpg.Record:
         return await conn.fetchrow('SELECT * FROM userphones WHERE username = $1', key)
@@ -175,6 +599,7 @@ class RKSOKPhoneStorageSerializer(ObjectSerializer):
 _SERIALIZER = RKSOKPhoneStorageSerializer()
 _SERIALIZER.register_format('Dict', DictRKSOKPhoneStorage)
 _SERIALIZER.register_format('PostgreSQL', PostgreSQLRKSOKPhoneStorage)
+_SERIALIZER.register_format('Arena', ArenaRKSOKPhoneStorage)
 
 
 if __name__ == "__main__":
@@ -2,8 +2,12 @@
 This module allow you manage storage by RKSOKCommand and represent answer from storage to RKSOKcommand.
 """
 
-from rksokprotocol import RKSOKCommand, RequestVerb, ResponseStatus
+from rksokdeadline import Deadline
+from rksokhotkeys import RKSOKHotKeyTracker
+from rksokkeyfilter import RKSOKKeyFilter
+from rksokprotocol import RKSOKCommand, RequestVerb, ResponseStatus, _SEPARATOR
 from rksokstorage import RKSOKPhoneStorage
+from typing import Dict, List, Tuple
 
 
 class RKSOKStorageManager:
@@ -11,81 +15,161 @@ class RKSOKStorageManager:
     This class allow manage storages RKSOKPhoneStorage by RKSOKCommand
     """
 
-    def __init__(self, storage: RKSOKPhoneStorage) -> None:
+    def __init__(self, storage: RKSOKPhoneStorage, key_filter: RKSOKKeyFilter = None, hot_key_tracker: RKSOKHotKeyTracker = None,
+                 search_result_limit: int = 100) -> None:
         """
         Init RKSOKStorageManager parameters.
 
         Parameters:
         storage (RKSOKPhoneStorage) - storage for data.
+        key_filter (RKSOKKeyFilter = None) - filter for answer about not existing keys without storage.
+        hot_key_tracker (RKSOKHotKeyTracker = None) - tracker of keys which dominate traffic.
+        search_result_limit (int = 100) - max count of entries in response for search by prefix.
         """
         self._storage = storage
+        self._key_filter = key_filter
+        self._hot_key_tracker = hot_key_tracker
+        self._search_result_limit = search_result_limit
         self._methods_for_request = {
             RequestVerb.GET.value: self._response_for_get,
             RequestVerb.WRITE.value: self._response_for_write,
             RequestVerb.DELETE.value: self._response_for_delete,
+            RequestVerb.SEARCH.value: self._response_for_search,
         }
 
-    async def get_response_for_request(self, request: RKSOKCommand) -> RKSOKCommand:
+    async def get_response_for_request(self, request: RKSOKCommand, deadline: Deadline = None) -> RKSOKCommand:
         """
         This function try make action with storage by RKSOKCommand.
 
         Parameters:
         request (RKSOKCommand) - RKSOKCommand for make action with storage.
+        deadline (Deadline = None) - deadline of client request.
 
         Returns:
         (RKSOKCommand) - RKSOK response, which depended from storage response.
+
+        Raises:
+        DeadlineExceededError - if deadline expired before storage finished work.
         """
         method =  self._methods_for_request.get(request.command(), None)
         if method is None:
             return RKSOKCommand(ResponseStatus.INCORRECT_REQUEST.value)
+
+        if self._hot_key_tracker is not None and request.key():
+            self._hot_key_tracker.record(request.command(), request.key())
        
-        return await method(request)            
+        if deadline is not None:
+            deadline.check("storage")
+        return await method(request, deadline)            
+
+    def get_hot_keys(self) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        This function return current top keys for every request verb.
+
+        Returns:
+        (Dict[str, List[Tuple[str, int]]]) - verb and list of keys with estimated count of requests
+        Empty dict if hot key tracker is not setup.
+        """
+        if self._hot_key_tracker is None:
+            return {}
+        return self._hot_key_tracker.top_keys()
+
+    async def rebuild_key_filter(self) -> None:
+        """
+        This function rebuild key filter by keys from storage, so deleted keys leave the filter.
+        """
+        if self._key_filter is None:
+            return
+        await self._key_filter.rebuild(self._storage)
 
-    async def _response_for_get(self, request: RKSOKCommand) -> RKSOKCommand:
+    async def _response_for_get(self, request: RKSOKCommand, deadline: Deadline = None) -> RKSOKCommand:
         """
         This function try get data from storage and modify it to RKSOKCommand.
 
         Parameters:
         request (RKSOKCommand) - RKSOKCommand for make action with storage.
+        deadline (Deadline = None) - deadline of client request.
 
         Returns:
         (RKSOKCommand)
         """
-        values_for_key = await self._storage.get_data(request.key())
+        if self._key_filter is not None and not self._key_filter.might_contain(request.key()):
+            return RKSOKCommand(ResponseStatus.NOTFOUND.value)
+        values_for_key = await self._storage.get_data(request.key(), deadline)
         if not values_for_key:
             return RKSOKCommand(ResponseStatus.NOTFOUND.value)
         return RKSOKCommand(ResponseStatus.OK.value, value=values_for_key)
 
-    async def _response_for_write(self, request):
+    async def _response_for_write(self, request: RKSOKCommand, deadline: Deadline = None) -> RKSOKCommand:
         """
         This function try write data to storage.
 
         Parameters:
         request (RKSOKCommand) - RKSOKCommand for make action with storage.
+        deadline (Deadline = None) - deadline of client request.
 
         Returns:
         (RKSOKCommand)
         """
-        result_write_operation =  await self._storage.set_data(request.key(), request.value())
+        if self._key_filter is not None:
+            self._key_filter.add(request.key())
+        result_write_operation =  await self._storage.set_data(request.key(), request.value(), deadline)
         if not result_write_operation:
             return RKSOKCommand(ResponseStatus.INCORRECT_REQUEST.value)
+        if self._key_filter is not None:
+            # Rebuild of filter could start and scan storage while key was written,
+            # so key is added again, else new filter can miss it.
+            self._key_filter.add(request.key())
         return RKSOKCommand(ResponseStatus.OK.value)
 
-    async def _response_for_delete(self, request):
+    async def _response_for_delete(self, request: RKSOKCommand, deadline: Deadline = None) -> RKSOKCommand:
         """
         This function try delete data from storage.
 
         Parameters:
         request (RKSOKCommand) - RKSOKCommand for make action with storage.
+        deadline (Deadline = None) - deadline of client request.
 
         Returns:
         (RKSOKCommand)
         """
-        result_delete_operation =  await self._storage.delete_data(request.key())
+        result_delete_operation =  await self._storage.delete_data(request.key(), deadline)
         if not result_delete_operation:
             return RKSOKCommand(ResponseStatus.NOTFOUND.value)
         return RKSOKCommand(ResponseStatus.OK.value)
 
+    async def _response_for_search(self, request: RKSOKCommand, deadline: Deadline = None) -> RKSOKCommand:
+        """
+        This function try find data for keys which start with prefix from request.
+        Every found entry is one line of response value: "key — phone_1, phone_2".
+        If more entries than limit exist, last line of response value is "...".
+
+        Parameters:
+        request (RKSOKCommand) - RKSOKCommand for make action with storage (key of request is prefix, "*" at the end is allowed).
+        deadline (Deadline = None) - deadline of client request.
+
+        Returns:
+        (RKSOKCommand)
+        """
+        prefix = (request.key() or "").rstrip("*")
+        if not prefix:
+            return RKSOKCommand(ResponseStatus.INCORRECT_REQUEST.value)
+
+        lines = []
+        try:
+            # One entry more than limit is requested for know that result was cut.
+            async for key, value in self._storage.search_prefix(prefix, self._search_result_limit + 1, deadline):
+                if len(lines) == self._search_result_limit:
+                    lines.append("...")
+                    break
+                lines.append(f"{key} — {', '.join(value.split(_SEPARATOR))}")
+        except NotImplementedError:
+            return RKSOKCommand(ResponseStatus.INCORRECT_REQUEST.value)
+
+        if not lines:
+            return RKSOKCommand(ResponseStatus.NOTFOUND.value)
+        return RKSOKCommand(ResponseStatus.OK.value, value=_SEPARATOR.join(lines))
+
 
 if __name__ == '__main__':
     pass
\ No newline at end of file
@@ -3,12 +3,23 @@ This module allow you to start work RKSOK server.
 """
 
 import asyncio
+import errno
+import logging
+import os
+import socket
+import stat
 import time
 
 from typing import Tuple
 
-from collections import namedtuple
+from collections import Counter, namedtuple
 from decouple import config
+from rksokcodec import CodecRKSOKPhoneStorage, ValueCodec
+from rksokdeadline import Deadline
+from rksokexception import DeadlineExceededError
+from rksokhotkeys import RKSOKHotKeyTracker
+from rksokkeyfilter import RKSOKKeyFilter
+from rksokoffload import LoopLagMonitor, RKSOKCommandOffloader
 from rksokprotocol import RequestVerb, ResponseStatus, RKSOKCommand
 from rksokstoragemanager import RKSOKStorageManager
 from rksokstorage import RKSOKPhoneStorage
@@ -17,16 +28,40 @@ ENCODING = "UTF-8"
 SEPARATOR = "\r\n"
 ENDING = "\r\n\r\n"
 
-SERVER_HOST = config("SERVER_HOST")
-SERVER_PORT = int(config("SERVER_PORT"))
+SERVER_HOST = config("SERVER_HOST", default="")
+SERVER_PORT = config("SERVER_PORT", default="")
+SERVER_PORT = int(SERVER_PORT) if SERVER_PORT != "" else None
+SERVER_UNIX_SOCKET = config("SERVER_UNIX_SOCKET", default="")
+SERVER_UNIX_SOCKET_MODE = int(config("SERVER_UNIX_SOCKET_MODE", default="660"), 8)
 
 VALIDATE_SERVER_HOST = config("VALIDATE_SERVER_HOST")
 VALIDATE_SERVER_PORT = int(config("VALIDATE_SERVER_PORT"))
 
-CLIENT_REQUEST_TIMEOUT = int(config("CLIENT_REQUEST_TIMEOUT"))
-SERVER_RESPONSE_TIMEOUT = int(config("SERVER_RESPONSE_TIMEOUT"))
+CLIENT_REQUEST_TIMEOUT = float(config("CLIENT_REQUEST_TIMEOUT"))
+SERVER_RESPONSE_TIMEOUT = float(config("SERVER_RESPONSE_TIMEOUT"))
+REQUEST_DEADLINE = float(config("REQUEST_DEADLINE", default=CLIENT_REQUEST_TIMEOUT + SERVER_RESPONSE_TIMEOUT))
+
+OFFLOAD_THRESHOLD = int(config("OFFLOAD_THRESHOLD", default=64 * 1024))
+OFFLOAD_MAX_WORKERS = int(config("OFFLOAD_MAX_WORKERS", default=2))
+OFFLOAD_EXECUTOR = config("OFFLOAD_EXECUTOR", default="process")
+LOOP_LAG_BUDGET = float(config("LOOP_LAG_BUDGET", default=0.05))
+LOOP_LAG_CHECK_INTERVAL = float(config("LOOP_LAG_CHECK_INTERVAL", default=0.5))
 
 STORAGE_TYPE = config("STORAGE_TYPE")
+SEARCH_RESULT_LIMIT = int(config("SEARCH_RESULT_LIMIT", default=100))
+
+KEY_FILTER_ENABLED = config("KEY_FILTER_ENABLED", default=False, cast=bool)
+KEY_FILTER_CAPACITY = int(config("KEY_FILTER_CAPACITY", default=1000000))
+KEY_FILTER_FALSE_POSITIVE_RATE = float(config("KEY_FILTER_FALSE_POSITIVE_RATE", default=0.01))
+KEY_FILTER_MAX_MEMORY = int(config("KEY_FILTER_MAX_MEMORY", default=16 * 1024 * 1024))
+KEY_FILTER_REBUILD_INTERVAL = float(config("KEY_FILTER_REBUILD_INTERVAL", default=3600))
+
+HOT_KEYS_ENABLED = config("HOT_KEYS_ENABLED", default=False, cast=bool)
+HOT_KEYS_TOP_K = int(config("HOT_KEYS_TOP_K", default=10))
+HOT_KEYS_SKETCH_WIDTH = int(config("HOT_KEYS_SKETCH_WIDTH", default=2048))
+HOT_KEYS_SKETCH_DEPTH = int(config("HOT_KEYS_SKETCH_DEPTH", default=4))
+HOT_KEYS_DECAY_INTERVAL = float(config("HOT_KEYS_DECAY_INTERVAL", default=60))
+HOT_KEYS_LOG_INTERVAL = float(config("HOT_KEYS_LOG_INTERVAL", default=60))
 
 if STORAGE_TYPE == 'PostgreSQL':
     STORAGE_PARM = {
@@ -35,12 +70,25 @@ if STORAGE_TYPE == 'PostgreSQL':
         'database': config("DB_NAME"),
         'host': config("DB_HOST")
     }
+elif STORAGE_TYPE == 'Arena':
+    STORAGE_PARM = {
+        'arena_size': int(config("ARENA_SIZE", default=1024 * 1024)),
+        'defragment_threshold': float(config("ARENA_DEFRAGMENT_THRESHOLD", default=0.5))
+    }
 else:
     STORAGE_PARM = {}
 
+STORAGE_DEFRAGMENT_INTERVAL = float(config("STORAGE_DEFRAGMENT_INTERVAL", default=60))
+STORAGE_STATISTICS_LOG_INTERVAL = float(config("STORAGE_STATISTICS_LOG_INTERVAL", default=300))
+
+STORAGE_COMPRESSION_CODEC = config("STORAGE_COMPRESSION_CODEC", default="")
+STORAGE_COMPRESSION_THRESHOLD = int(config("STORAGE_COMPRESSION_THRESHOLD", default=1024))
+
 
 ServerParameters = namedtuple("ServerParameters", ["host", "port"])
 
+logger = logging.getLogger(__name__)
+
 
 class RKSOKPhoneBookServer:
     """
@@ -48,30 +96,194 @@ class RKSOKPhoneBookServer:
     He allow get data from clients, validate requests on "Server for validation" and send responses for clients.
     """
 
-    def __init__(self, server_parameters: ServerParameters, storage: RKSOKPhoneStorage, validate_server_parameters: ServerParameters = ServerParameters(None, None)) -> None:
+    def __init__(self, server_parameters: ServerParameters, storage: RKSOKPhoneStorage, validate_server_parameters: ServerParameters = ServerParameters(None, None),
+                 key_filter: RKSOKKeyFilter = None, key_filter_rebuild_interval: float = KEY_FILTER_REBUILD_INTERVAL,
+                 hot_key_tracker: RKSOKHotKeyTracker = None, hot_keys_log_interval: float = HOT_KEYS_LOG_INTERVAL,
+                 request_deadline: float = REQUEST_DEADLINE, search_result_limit: int = SEARCH_RESULT_LIMIT,
+                 unix_socket_path: str = None, unix_socket_mode: int = SERVER_UNIX_SOCKET_MODE,
+                 offloader: RKSOKCommandOffloader = None, loop_lag_monitor: LoopLagMonitor = None) -> None:
         """
         Init server parameters
 
         Parameters:
-        server_parameters (Tuple[str, int]) - host and port for start server
+        server_parameters (Tuple[str, int]) - host and port for start server ((None, None) for not listen TCP)
         storage (RKSOKPhoneStorage) - storage for work with data
         validate_server_parameters (Tuple[str, int]=(None, None)) - host and port for "Server for validation"
+        key_filter (RKSOKKeyFilter = None) - filter for answer about not existing keys without storage
+        key_filter_rebuild_interval (float) - seconds between rebuilds of key filter
+        hot_key_tracker (RKSOKHotKeyTracker = None) - tracker of keys which dominate traffic
+        hot_keys_log_interval (float) - seconds between log lines with hot keys
+        request_deadline (float) - seconds from accept of request after which work for it is dropped
+        search_result_limit (int) - max count of entries in response for ПОИЩИ
+        unix_socket_path (str = None) - path of Unix domain socket for clients on the same host
+        unix_socket_mode (int) - permissions for Unix domain socket (for example: 0o660)
+        offloader (RKSOKCommandOffloader = None) - decoder, parser and serializer of commands (by default all commands are handled in event loop)
+        loop_lag_monitor (LoopLagMonitor = None) - monitor which write to log when event loop is blocked
         """
         self._host, self._port = server_parameters
+        self._unix_socket_path = unix_socket_path
+        self._unix_socket_mode = unix_socket_mode
+        if not self._listen_tcp() and not self._unix_socket_path:
+            raise ValueError("Host and port or Unix domain socket path must be specified.")
         self._validate_server_host, self._validate_server_port = validate_server_parameters                  
-        self._storage_manager = RKSOKStorageManager(storage)
+        self._storage = storage
+        self._storage_manager = RKSOKStorageManager(storage, key_filter, hot_key_tracker, search_result_limit)
+        self._key_filter = key_filter
+        self._key_filter_rebuild_interval = key_filter_rebuild_interval
+        self._hot_key_tracker = hot_key_tracker
+        self._hot_keys_log_interval = hot_keys_log_interval
+        self._request_deadline = request_deadline
+        self._requests_dropped_by_deadline = Counter()
+        self._offloader = offloader if offloader is not None else RKSOKCommandOffloader(max_workers=0)
+        self._loop_lag_monitor = loop_lag_monitor
 
     async def run_server(self):
         """
         Start server without limit by time.
         """
-        server = await asyncio.start_server(
-            self._handle_request,
-            self._host,
-            self._port)
+        servers = []
+        if self._listen_tcp():
+            servers.append(await asyncio.start_server(
+                self._handle_request,
+                self._host,
+                self._port))
+        if self._unix_socket_path:
+            servers.append(await self._start_unix_server())
+        for server in servers:
+            for server_socket in server.sockets:
+                logger.info("Listen %s", server_socket.getsockname())
+
+        background_tasks = [
+            asyncio.create_task(self._defragment_storage_periodically()),
+            asyncio.create_task(self._log_statistics_periodically()),
+        ]
+        if self._key_filter is not None:
+            background_tasks.append(asyncio.create_task(self._rebuild_key_filter_periodically()))
+        if self._hot_key_tracker is not None:
+            background_tasks.append(asyncio.create_task(self._log_hot_keys_periodically()))
+        if self._loop_lag_monitor is not None:
+            background_tasks.append(asyncio.create_task(self._loop_lag_monitor.run()))
+
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            for task in background_tasks:
+                task.cancel()
+            for server in servers:
+                server.close()
+            self._offloader.shutdown()
+            if self._unix_socket_path and os.path.exists(self._unix_socket_path):
+                os.unlink(self._unix_socket_path)
+
+    def _listen_tcp(self) -> bool:
+        """Return True if host and port for TCP are specified (port 0 means any free port)."""
+        return self._host not in (None, "") and self._port is not None
+
+    async def _start_unix_server(self) -> asyncio.AbstractServer:
+        """
+        Start listen Unix domain socket. Socket file which was left by stopped server is removed.
+
+        Raises:
+        OSError - if other server is listening the socket
+        """
+        self._remove_stale_unix_socket()
+        unix_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Socket file get permissions from umask at bind, so it is never accessible wider than mode.
+            # Umask is common for all threads, so it is restored right after bind without await between.
+            old_umask = os.umask(~self._unix_socket_mode & 0o777)
+            try:
+                unix_socket.bind(self._unix_socket_path)
+            finally:
+                os.umask(old_umask)
+            return await asyncio.start_unix_server(self._handle_request, sock=unix_socket)
+        except BaseException:
+            unix_socket.close()
+            raise
+
+    def _remove_stale_unix_socket(self) -> None:
+        """
+        Remove socket file if nobody listen it.
+        asyncio remove any socket file on path before bind, so socket of running server must be checked before.
+        """
+        try:
+            if not stat.S_ISSOCK(os.stat(self._unix_socket_path).st_mode):
+                return
+        except FileNotFoundError:
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            probe.settimeout(1)
+            try:
+                probe.connect(self._unix_socket_path)
+            except ConnectionRefusedError:
+                os.unlink(self._unix_socket_path)
+                return
+            except socket.timeout:
+                pass
+        raise OSError(errno.EADDRINUSE, f"Unix domain socket {self._unix_socket_path} is listened by other server.")
+
+    async def _rebuild_key_filter_periodically(self) -> None:
+        """
+        Build key filter on start and rebuild it every interval for remove deleted keys from it.
+        """
+        while self._key_filter.is_enabled():
+            try:
+                await self._storage_manager.rebuild_key_filter()
+                logger.info("Key filter rebuilt: %s", self._key_filter.statistics())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Key filter rebuild failed")
+            await asyncio.sleep(self._key_filter_rebuild_interval)
+        logger.warning("Key filter disabled: storage %s does not support iteration by keys", STORAGE_TYPE)
+
+    async def _defragment_storage_periodically(self) -> None:
+        """
+        Let storage compact released memory every interval.
+        """
+        while True:
+            await asyncio.sleep(STORAGE_DEFRAGMENT_INTERVAL)
+            try:
+                await self._storage.defragment()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Storage defragmentation failed")
+
+    async def _log_statistics_periodically(self) -> None:
+        """
+        Write storage statistics (for example: compression ratio) and count of dropped requests to log every interval.
+        """
+        while True:
+            await asyncio.sleep(STORAGE_STATISTICS_LOG_INTERVAL)
+            statistics = self._storage.statistics()
+            if statistics:
+                logger.info("Storage statistics: %s", statistics)
+            if self._requests_dropped_by_deadline:
+                logger.info("Requests dropped by deadline: %s", self.get_requests_dropped_by_deadline())
+            logger.info("Commands handling: %s", self._offloader.statistics())
+            if self._loop_lag_monitor is not None:
+                logger.info("Event loop lag: %s", self._loop_lag_monitor.statistics())
+
+    async def _log_hot_keys_periodically(self) -> None:
+        """
+        Write current top keys for every verb to log every interval.
+        """
+        while True:
+            await asyncio.sleep(self._hot_keys_log_interval)
+            logger.info("Hot keys: %s", self.get_hot_keys())
 
-        async with server:
-            await server.serve_forever()
+    def get_hot_keys(self) -> dict:
+        """
+        Return current top keys with estimated count of requests for every request verb.
+        """
+        return self._storage_manager.get_hot_keys()
+
+    def get_requests_dropped_by_deadline(self) -> dict:
+        """
+        Return count of requests which were dropped because deadline expired, for every stage of handling.
+        """
+        return dict(self._requests_dropped_by_deadline)
 
     async def _get_all_data_from_reader(self, reader: asyncio.StreamReader) -> str:
         """
@@ -83,42 +295,57 @@ class RKSOKPhoneBookServer:
         Returns:
         (str) - decode message from reader
         """
-        message = b""
+        ending = ENDING.encode(ENCODING)
+        chunks = []
+        tail = b""
         while True:
             data = await reader.read(1024)
-            if data:
-                message += data
-                if message.endswith(ENDING.encode(ENCODING)):
-                    break
-            else:
-                return message.decode(ENCODING)
-        return message.decode(ENCODING)
-
-    async def _get_validation_response_for_request(self, request: RKSOKCommand) -> Tuple[bool, RKSOKCommand]:
+            if not data:
+                break
+            chunks.append(data)
+            # Ending can be split between chunks, so only last bytes of message are checked.
+            tail = (tail + data)[-len(ending):]
+            if tail == ending:
+                break
+        message = b"".join(chunks)
+        return await self._offloader.decode(message)
+
+    async def _get_validation_response_for_request(self, request: RKSOKCommand, deadline: Deadline = None) -> Tuple[bool, RKSOKCommand]:
         """
         This function send response to setup Server for validation.
 
         Parameters:
         request (RKSOKCommand) - rksok response to validation server
+        deadline (Deadline = None) - deadline of client request
 
         Returns:
         Tuple[True, RKSOKCommand] - If everything is OK or if "Server for validation" does not setup.
         Tuple[False, RKSOKCommand] - If something is WRONG
+
+        Raises:
+        DeadlineExceededError - if deadline expired before "Server for validation" answered
         """
         try:
             if not all((self._validate_server_host, self._validate_server_port)):
                 return True, RKSOKCommand(ResponseStatus.APPROVED.value)
 
-            reader, writer = await asyncio.open_connection(self._validate_server_host, self._validate_server_port)
-            writer.write(str(request).encode(ENCODING))
+            if deadline is not None:
+                deadline.check("validation")
+            timeout = deadline.timeout(SERVER_RESPONSE_TIMEOUT) if deadline is not None else SERVER_RESPONSE_TIMEOUT
+
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self._validate_server_host, self._validate_server_port),
+                timeout
+            )
+            writer.write(await self._offloader.serialize(request))
 
             response = await asyncio.wait_for(
                 self._get_all_data_from_reader(reader),
-                SERVER_RESPONSE_TIMEOUT
+                deadline.timeout(SERVER_RESPONSE_TIMEOUT) if deadline is not None else SERVER_RESPONSE_TIMEOUT
             )
             
             writer.close()
-            rksok_response = RKSOKCommand.rksokcommand_from_str(response)
+            rksok_response = await self._offloader.parse(response)
             if rksok_response.command() == ResponseStatus.APPROVED.value:
                 return True, rksok_response
             else:
@@ -126,6 +353,8 @@ class RKSOKPhoneBookServer:
         except ConnectionRefusedError:
             return True, RKSOKCommand(ResponseStatus.APPROVED.value)
         except asyncio.TimeoutError:
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceededError("validation")
             return True, RKSOKCommand(ResponseStatus.APPROVED.value)
     
     async def _handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
@@ -139,45 +368,58 @@ class RKSOKPhoneBookServer:
         Returns:
         None
         """
+        deadline = Deadline(self._request_deadline)
         try:
             request = await asyncio.wait_for(
                 self._get_all_data_from_reader(reader),
-                CLIENT_REQUEST_TIMEOUT
+                deadline.timeout(CLIENT_REQUEST_TIMEOUT)
             )
         except asyncio.TimeoutError:
+            if deadline.expired():
+                # Client does not wait for response any more, so response is not sent.
+                self._requests_dropped_by_deadline["read"] += 1
+                writer.close()
+                return
             request = ''
 
-        if not self._client_request_is_correct_RKSOK(request):
-            response = RKSOKCommand(ResponseStatus.INCORRECT_REQUEST.value)
-        else:
-            valid, validation_server_response = await self._get_validation_response_for_request(RKSOKCommand(RequestVerb.CAN.value, value=request))
-            
-            if not valid:
-                response = validation_server_response
-            else:       
-                response = await self._get_response_for_request(RKSOKCommand.rksokcommand_from_str(request))         
+        try:
+            rksok_request = await self._offloader.parse(request)
+            if not self._client_request_is_correct_RKSOK(rksok_request):
+                response = RKSOKCommand(ResponseStatus.INCORRECT_REQUEST.value)
+            else:
+                valid, validation_server_response = await self._get_validation_response_for_request(RKSOKCommand(RequestVerb.CAN.value, value=request), deadline)
+                
+                if not valid:
+                    response = validation_server_response
+                else:       
+                    response = await self._get_response_for_request(rksok_request, deadline)         
+        except DeadlineExceededError as error:
+            # Client does not wait for response any more, so response is not sent.
+            self._requests_dropped_by_deadline[error.stage] += 1
+            writer.close()
+            return
         
         await self._send_response_to_writer(writer, response)
 
-    def _client_request_is_correct_RKSOK(self, request: str) -> bool:
+    def _client_request_is_correct_RKSOK(self, rksok_request: RKSOKCommand) -> bool:
         """The function checks the compliance of the request with the protocol RKSOK"""
-        rksok_request = RKSOKCommand.rksokcommand_from_str(request)
         if rksok_request.command() == ResponseStatus.INCORRECT_REQUEST.value:
             return False
         return True
 
-    async def _get_response_for_request(self, request: RKSOKCommand) -> RKSOKCommand:
+    async def _get_response_for_request(self, request: RKSOKCommand, deadline: Deadline = None) -> RKSOKCommand:
         """
         This function get response from storage manager if request is correct.
 
         Parameters:
         request (RKSOKCommand) - request for storage
+        deadline (Deadline = None) - deadline of client request
 
         Returns:
         (RKSOKCommand) - response from storage
         (RKSOKCommand) - incorrect_value response
         """
-        return await self._storage_manager.get_response_for_request(request)
+        return await self._storage_manager.get_response_for_request(request, deadline)
     
     async def _send_response_to_writer(self, writer: asyncio.StreamWriter, response: RKSOKCommand) -> None:
         """
@@ -190,16 +432,32 @@ class RKSOKPhoneBookServer:
         Returns:
         None
         """
-        writer.write(str(response).encode(ENCODING))
+        writer.write(await self._offloader.serialize(response))
         await writer.drain()
         writer.close()
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    offloader = RKSOKCommandOffloader(OFFLOAD_THRESHOLD, OFFLOAD_MAX_WORKERS, OFFLOAD_EXECUTOR, LOOP_LAG_BUDGET)
     storage = RKSOKPhoneStorage.get_cls_by_storage_type(STORAGE_TYPE)(**STORAGE_PARM)
+    if STORAGE_COMPRESSION_CODEC:
+        codec = ValueCodec.get_cls_by_codec_name(STORAGE_COMPRESSION_CODEC)()
+        storage = CodecRKSOKPhoneStorage(storage, codec, STORAGE_COMPRESSION_THRESHOLD, offloader)
+    key_filter = None
+    if KEY_FILTER_ENABLED:
+        key_filter = RKSOKKeyFilter(KEY_FILTER_CAPACITY, KEY_FILTER_FALSE_POSITIVE_RATE, KEY_FILTER_MAX_MEMORY)
+    hot_key_tracker = None
+    if HOT_KEYS_ENABLED:
+        hot_key_tracker = RKSOKHotKeyTracker(HOT_KEYS_TOP_K, HOT_KEYS_SKETCH_WIDTH, HOT_KEYS_SKETCH_DEPTH, HOT_KEYS_DECAY_INTERVAL)
     server = RKSOKPhoneBookServer(
         server_parameters=ServerParameters(SERVER_HOST, SERVER_PORT),
         storage=storage,
-        validate_server_parameters=ServerParameters(VALIDATE_SERVER_HOST, VALIDATE_SERVER_PORT)
+        validate_server_parameters=ServerParameters(VALIDATE_SERVER_HOST, VALIDATE_SERVER_PORT),
+        key_filter=key_filter,
+        hot_key_tracker=hot_key_tracker,
+        unix_socket_path=SERVER_UNIX_SOCKET or None,
+        offloader=offloader,
+        loop_lag_monitor=LoopLagMonitor(LOOP_LAG_CHECK_INTERVAL, LOOP_LAG_BUDGET)
         )
     asyncio.run(server.run_server())
\ No newline at end of file
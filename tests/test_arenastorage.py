@@ -0,0 +1,63 @@
+"""
+This module check ArenaRKSOKPhoneStorage against plain dict.
+"""
+
+import asyncio
+import random
+import sys
+import unittest
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rksokstorage import ArenaRKSOKPhoneStorage
+
+
+class ArenaRKSOKPhoneStorageTest(unittest.IsolatedAsyncioTestCase):
+    """
+    Random writes and deletes are made while defragment is running,
+    after every step storage must contain the same data as dict.
+    """
+
+    async def asyncSetUp(self) -> None:
+        self.random = random.Random(2024)
+        # Small arenas and low threshold make defragment work with many arenas on every pass.
+        self.storage = ArenaRKSOKPhoneStorage(arena_size=256, defragment_threshold=0.1)
+        self.expected = {}
+
+    async def _random_changes(self, count: int) -> None:
+        for _ in range(count):
+            key = f"Имя {self.random.randrange(300)}"
+            if self.random.random() < 0.3:
+                self.assertEqual(await self.storage.delete_data(key), key in self.expected)
+                self.expected.pop(key, None)
+            else:
+                value = "7" * self.random.randrange(0, 300)
+                self.assertTrue(await self.storage.set_data(key, value))
+                self.expected[key] = value
+            await asyncio.sleep(0)
+
+    async def _check(self) -> None:
+        for key_number in range(300):
+            key = f"Имя {key_number}"
+            self.assertEqual(await self.storage.get_data(key), self.expected.get(key))
+        self.assertEqual(sorted([key async for key in self.storage.iter_keys()]), sorted(self.expected))
+        found = [key async for key, _ in self.storage.search_prefix("Имя", len(self.expected) + 1)]
+        self.assertEqual(found, sorted(self.expected, key=lambda key: key.encode("UTF-8")))
+
+    async def test_defragment_with_concurrent_changes(self) -> None:
+        for _ in range(50):
+            await asyncio.gather(self.storage.defragment(), self._random_changes(40))
+            await self._check()
+
+    async def test_defragment_without_changes(self) -> None:
+        for _ in range(20):
+            await self._random_changes(100)
+            await self.storage.defragment()
+            await self._check()
+        self.assertGreater(self.storage.statistics()["keys"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+This module check that CodecRKSOKPhoneStorage return the same values which were written.
+"""
+
+import random
+import string
+import sys
+import unittest
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rksokcodec import _MARKER, CodecRKSOKPhoneStorage, ZlibValueCodec
+from rksokstorage import DictRKSOKPhoneStorage
+
+
+class CodecRKSOKPhoneStorageTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.inner_storage = DictRKSOKPhoneStorage()
+        self.storage = CodecRKSOKPhoneStorage(self.inner_storage, ZlibValueCodec(), threshold=100)
+
+    async def _round_trip(self, value: str) -> str:
+        await self.storage.set_data("Имя", value)
+        self.assertEqual(await self.storage.get_data("Имя"), value)
+        return await self.inner_storage.get_data("Имя")
+
+    async def test_value_less_than_threshold_is_stored_as_is(self) -> None:
+        value = "8-900-000-00-00"
+        self.assertEqual(await self._round_trip(value), value)
+
+    async def test_value_from_threshold_is_compressed(self) -> None:
+        value = "\r\n".join(f"8-900-{number:07d}" for number in range(100))
+        stored = await self._round_trip(value)
+        self.assertTrue(stored.startswith(f"{_MARKER}zlib:"))
+        self.assertLess(len(stored), len(value))
+        self.assertEqual(self.storage.statistics()["compressed_values"], 1)
+
+    async def test_incompressible_value_is_stored_as_is(self) -> None:
+        # Compressed random printable symbols in base64 are longer than value.
+        generator = random.Random(29)
+        value = "".join(generator.choice(string.ascii_letters + string.digits + string.punctuation) for _ in range(300))
+        self.assertEqual(await self._round_trip(value), value)
+        self.assertEqual(self.storage.statistics()["raw_values"], 1)
+
+    async def test_value_with_marker_is_escaped(self) -> None:
+        for value in (f"{_MARKER}zlib:not compressed", _MARKER, f"{_MARKER}raw:x", f"{_MARKER}zlib:" + "7" * 200):
+            stored = await self._round_trip(value)
+            self.assertTrue(stored.startswith(f"{_MARKER}raw:") or stored.startswith(f"{_MARKER}zlib:"))
+
+    async def test_unknown_codec_value_is_returned_as_is(self) -> None:
+        value = f"{_MARKER}lz4:AAAA"
+        await self.inner_storage.set_data("Имя", value)
+        with self.assertLogs("rksokcodec", "WARNING"):
+            self.assertEqual(await self.storage.get_data("Имя"), value)
+
+    async def test_marker_without_codec_is_returned_as_is(self) -> None:
+        value = f"{_MARKER}no codec name"
+        await self.inner_storage.set_data("Имя", value)
+        with self.assertLogs("rksokcodec", "WARNING"):
+            self.assertEqual(await self.storage.get_data("Имя"), value)
+
+    async def test_damaged_payload_is_returned_as_is(self) -> None:
+        value = f"{_MARKER}zlib:bm90IHpsaWI="
+        await self.inner_storage.set_data("Имя", value)
+        with self.assertLogs("rksokcodec", "ERROR"):
+            self.assertEqual(await self.storage.get_data("Имя"), value)
+
+    async def test_search_prefix_decodes_values(self) -> None:
+        value = "8-900-000-00-00\r\n" * 20
+        await self.storage.set_data("Имя 1", value)
+        await self.storage.set_data("Имя 2", "8-900")
+        found = [item async for item in self.storage.search_prefix("Имя", 10)]
+        self.assertEqual(found, [("Имя 1", value), ("Имя 2", "8-900")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+This module check deadline of RKSOK request and dropping of requests by stage of handling.
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Server module reads its configuration on import, so tests setup it without .env file.
+for _name, _value in {
+    "VALIDATE_SERVER_HOST": "",
+    "VALIDATE_SERVER_PORT": "0",
+    "CLIENT_REQUEST_TIMEOUT": "7",
+    "SERVER_RESPONSE_TIMEOUT": "7",
+    "STORAGE_TYPE": "Dict",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from rksokdeadline import Deadline
+from rksokexception import DeadlineExceededError
+from rksokstorage import DictRKSOKPhoneStorage
+from server import RKSOKPhoneBookServer, ServerParameters
+
+
+class DeadlineTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_check_before_and_after_expire(self) -> None:
+        deadline = Deadline(0.05)
+        deadline.check("storage")
+        self.assertFalse(deadline.expired())
+        self.assertLessEqual(deadline.timeout(7), 0.05)
+        self.assertEqual(deadline.timeout(0.01), 0.01)
+        await asyncio.sleep(0.06)
+        self.assertTrue(deadline.expired())
+        self.assertEqual(deadline.remaining(), 0.0)
+        with self.assertRaises(DeadlineExceededError) as error:
+            deadline.check("storage")
+        self.assertEqual(error.exception.stage, "storage")
+
+    async def test_wait_for_raises_with_stage(self) -> None:
+        deadline = Deadline(0.05)
+        self.assertEqual(await deadline.wait_for(asyncio.sleep(0, "done"), "validation"), "done")
+        with self.assertRaises(DeadlineExceededError) as error:
+            await deadline.wait_for(asyncio.sleep(1), "validation")
+        self.assertEqual(error.exception.stage, "validation")
+
+    async def test_wait_for_expired_deadline_does_not_start_work(self) -> None:
+        deadline = Deadline(0)
+        coroutine = asyncio.sleep(1)
+        with self.assertRaises(DeadlineExceededError):
+            await deadline.wait_for(coroutine, "storage")
+        # Coroutine is closed, so it is not left never awaited.
+        self.assertIsNone(coroutine.cr_frame)
+
+
+class _SlowDictRKSOKPhoneStorage(DictRKSOKPhoneStorage):
+    async def get_data(self, key, deadline=None):
+        await asyncio.sleep(0.3)
+        return await super().get_data(key, deadline)
+
+
+class DropByDeadlineTest(unittest.IsolatedAsyncioTestCase):
+
+    async def _request(self, server: RKSOKPhoneBookServer, request: str) -> bytes:
+        listener = await asyncio.start_server(server._handle_request, "127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+            writer.write(request.encode("UTF-8"))
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+        finally:
+            listener.close()
+
+    async def test_response_before_deadline(self) -> None:
+        server = RKSOKPhoneBookServer(ServerParameters("127.0.0.1", 0), DictRKSOKPhoneStorage(), request_deadline=1)
+        response = await self._request(server, "ОТДОВАЙ Имя РКСОК/1.0\r\n\r\n")
+        self.assertEqual(response.decode("UTF-8"), "НИНАШОЛ РКСОК/1.0\r\n\r\n")
+        self.assertEqual(server.get_requests_dropped_by_deadline(), {})
+
+    async def test_drop_while_read(self) -> None:
+        server = RKSOKPhoneBookServer(ServerParameters("127.0.0.1", 0), DictRKSOKPhoneStorage(), request_deadline=0.2)
+        # Request without ending, so server wait for rest of it until deadline.
+        self.assertEqual(await self._request(server, "ОТДОВАЙ Имя"), b"")
+        self.assertEqual(server.get_requests_dropped_by_deadline(), {"read": 1})
+
+    async def test_drop_while_validation(self) -> None:
+        async def silent_validation_server(reader, writer):
+            await asyncio.sleep(1)
+            writer.close()
+
+        validation_server = await asyncio.start_server(silent_validation_server, "127.0.0.1", 0)
+        try:
+            server = RKSOKPhoneBookServer(
+                ServerParameters("127.0.0.1", 0), DictRKSOKPhoneStorage(),
+                ServerParameters(*validation_server.sockets[0].getsockname()[:2]), request_deadline=0.2)
+            self.assertEqual(await self._request(server, "ОТДОВАЙ Имя РКСОК/1.0\r\n\r\n"), b"")
+        finally:
+            validation_server.close()
+        self.assertEqual(server.get_requests_dropped_by_deadline(), {"validation": 1})
+
+    async def test_drop_while_storage(self) -> None:
+        server = RKSOKPhoneBookServer(ServerParameters("127.0.0.1", 0), _SlowDictRKSOKPhoneStorage(), request_deadline=0.2)
+        self.assertEqual(await self._request(server, "ОТДОВАЙ Имя РКСОК/1.0\r\n\r\n"), b"")
+        self.assertEqual(server.get_requests_dropped_by_deadline(), {"storage": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+This module check that hot keys can not be displaced by keys requested once.
+"""
+
+import sys
+import unittest
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rksokhotkeys import CountMinSketch, HeavyHitters
+
+
+class CountMinSketchTest(unittest.TestCase):
+
+    def test_rows_are_independent(self) -> None:
+        sketch = CountMinSketch(2048, 4)
+        hot_positions = {tuple(sketch._positions(f"Горячий {number}")) for number in range(100)}
+        # With independent rows chance that key share all counters with one of hot keys is about 6e-6 for 200000 keys.
+        same_counters = [number for number in range(200000) if tuple(sketch._positions(f"Имя {number}")) in hot_positions]
+        self.assertEqual(same_counters, [])
+
+    def test_depth_bigger_than_one_digest(self) -> None:
+        sketch = CountMinSketch(2048, 12)
+        positions = list(sketch._positions("Имя"))
+        self.assertEqual(len(positions), 12)
+        self.assertEqual(positions, list(sketch._positions("Имя")))
+        self.assertEqual(sketch.add("Имя", 5), 5)
+
+
+class HeavyHittersTest(unittest.TestCase):
+
+    def test_one_off_key_does_not_displace_hot_key(self) -> None:
+        heavy_hitters = HeavyHitters(3, 2048, 4)
+        hot_keys = {"Горячий 76": 300, "Горячий 1": 200, "Горячий 67": 100}
+        for key, count in hot_keys.items():
+            for _ in range(count):
+                heavy_hitters.add(key)
+        # "Имя 27607" shared all counters with "Горячий 76" when rows were made by double hashing.
+        for number in range(60000):
+            heavy_hitters.add(f"Имя {number}")
+        self.assertEqual([key for key, _ in heavy_hitters.top()], list(hot_keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
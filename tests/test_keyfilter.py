@@ -0,0 +1,87 @@
+"""
+This module check rebuild of key filter and its false positive rate.
+"""
+
+import asyncio
+import sys
+import unittest
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rksokkeyfilter import BloomFilter, RKSOKKeyFilter
+from rksokstorage import ArenaRKSOKPhoneStorage, DictRKSOKPhoneStorage
+
+
+class RKSOKKeyFilterTest(unittest.IsolatedAsyncioTestCase):
+
+    async def _check_rebuild_with_concurrent_writes(self, storage) -> None:
+        for number in range(20000):
+            await storage.set_data(f"Имя {number}", "8-900")
+        key_filter = RKSOKKeyFilter(100000, 0.01)
+        written_while_rebuild = []
+
+        async def write_while_rebuild() -> None:
+            for number in range(100):
+                key = f"Новый {number}"
+                await storage.set_data(key, "8-900")
+                key_filter.add(key)
+                written_while_rebuild.append(key)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(key_filter.rebuild(storage), write_while_rebuild())
+        # Rebuild must return control to event loop, else writes could not run before its end.
+        self.assertEqual(len(written_while_rebuild), 100)
+        for number in range(20000):
+            self.assertTrue(key_filter.might_contain(f"Имя {number}"))
+        for key in written_while_rebuild:
+            self.assertTrue(key_filter.might_contain(key))
+
+    async def test_rebuild_dict_storage(self) -> None:
+        await self._check_rebuild_with_concurrent_writes(DictRKSOKPhoneStorage())
+
+    async def test_rebuild_arena_storage(self) -> None:
+        await self._check_rebuild_with_concurrent_writes(ArenaRKSOKPhoneStorage())
+
+    async def test_rebuild_yields_to_event_loop(self) -> None:
+        storage = DictRKSOKPhoneStorage()
+        for number in range(20000):
+            await storage.set_data(f"Имя {number}", "8-900")
+        key_filter = RKSOKKeyFilter(100000, 0.01)
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0)
+        ticks = 0
+        await key_filter.rebuild(storage)
+        ticker.cancel()
+        self.assertGreaterEqual(ticks, 10)
+
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_memory_limit_warns_and_reports_false_positive_rate(self) -> None:
+        with self.assertLogs("rksokkeyfilter", "WARNING"):
+            bloom_filter = BloomFilter(100000, 0.01, max_memory=1000)
+        for number in range(100000):
+            bloom_filter.add(f"Имя {number}")
+        self.assertGreater(bloom_filter.estimated_false_positive_rate(), 0.9)
+
+    def test_estimated_false_positive_rate_is_near_target(self) -> None:
+        bloom_filter = BloomFilter(10000, 0.01)
+        for number in range(10000):
+            bloom_filter.add(f"Имя {number}")
+        self.assertAlmostEqual(bloom_filter.estimated_false_positive_rate(), 0.01, delta=0.005)
+        false_positives = sum(f"Другой {number}" in bloom_filter for number in range(10000))
+        self.assertLess(false_positives / 10000, 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
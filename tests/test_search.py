@@ -0,0 +1,194 @@
+"""
+This module check search of entries by prefix of key in storages and in storage manager.
+"""
+
+import re
+import sys
+import unittest
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rksokprotocol import RequestVerb, ResponseStatus, RKSOKCommand
+from rksokstorage import ArenaRKSOKPhoneStorage, DictRKSOKPhoneStorage, PostgreSQLRKSOKPhoneStorage
+from rksokstoragemanager import RKSOKStorageManager
+
+
+class _LikeCursor:
+    def __init__(self, records: list) -> None:
+        self._records = records
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self._records:
+            yield record
+
+
+class _LikeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _LikeConnection:
+    """
+    Stand-in for asyncpg.Connection which keep table userphones in dict.
+    LIKE is matched by rules of PostgreSQL, so not escaped "%" and "_" in pattern match any symbols.
+    """
+
+    def __init__(self, table: dict) -> None:
+        self._table = table
+
+    async def fetchrow(self, query: str, key: str):
+        if key not in self._table:
+            return None
+        return {"username": key, "phones": self._table[key]}
+
+    async def execute(self, query: str, key: str, *values):
+        if query.startswith("INSERT"):
+            self._table[key] = values[0]
+        elif query.startswith("DELETE"):
+            self._table.pop(key, None)
+
+    def cursor(self, query: str, pattern: str, limit: int):
+        matcher = re.compile(self._like_to_regex(pattern), re.DOTALL)
+        keys = sorted(key for key in self._table if matcher.fullmatch(key))[:limit]
+        return _LikeCursor([{"username": key, "phones": self._table[key]} for key in keys])
+
+    def transaction(self):
+        return _LikeTransaction()
+
+    async def close(self):
+        pass
+
+    @staticmethod
+    def _like_to_regex(pattern: str) -> str:
+        regex = []
+        symbols = iter(pattern)
+        for symbol in symbols:
+            if symbol == "\\":
+                regex.append(re.escape(next(symbols)))
+            elif symbol == "%":
+                regex.append(".*")
+            elif symbol == "_":
+                regex.append(".")
+            else:
+                regex.append(re.escape(symbol))
+        return "".join(regex)
+
+
+def _make_postgresql_storage() -> PostgreSQLRKSOKPhoneStorage:
+    storage = PostgreSQLRKSOKPhoneStorage(user="", password="", database="", host="")
+    table = {}
+
+    async def connect():
+        return _LikeConnection(table)
+    storage._connect = connect
+    return storage
+
+
+class _SearchPrefixTests:
+    """Tests for search_prefix which are common for all storages."""
+
+    def make_storage(self):
+        raise NotImplementedError
+
+    async def asyncSetUp(self) -> None:
+        self.storage = self.make_storage()
+
+    async def _fill(self, keys) -> None:
+        for key in keys:
+            await self.storage.set_data(key, f"8-900 {key}")
+
+    async def _search(self, prefix: str, limit: int) -> list:
+        return [key async for key, _ in self.storage.search_prefix(prefix, limit)]
+
+    async def test_sorted_keys_with_prefix(self) -> None:
+        await self._fill(["Петр", "Иван 2", "Иван 10", "Иван 1", "Ивана", "Игорь"])
+        self.assertEqual(await self._search("Иван ", 10), ["Иван 1", "Иван 10", "Иван 2"])
+        self.assertEqual(await self._search("Ив", 10), ["Иван 1", "Иван 10", "Иван 2", "Ивана"])
+        self.assertEqual(await self._search("Сергей", 10), [])
+        found = [item async for item in self.storage.search_prefix("Петр", 10)]
+        self.assertEqual(found, [("Петр", "8-900 Петр")])
+
+    async def test_limit_plus_one(self) -> None:
+        await self._fill([f"Имя {number:02d}" for number in range(10)])
+        self.assertEqual(await self._search("Имя", 3), ["Имя 00", "Имя 01", "Имя 02"])
+        # Manager request one entry more than limit for know that result was cut.
+        self.assertEqual(len(await self._search("Имя", 10 + 1)), 10)
+
+    async def test_like_symbols_in_keys(self) -> None:
+        await self._fill(["100%", "100% скидка", "1000", "100x", "a_b", "axb", "a\\b", "a\\_b"])
+        self.assertEqual(await self._search("100%", 10), ["100%", "100% скидка"])
+        self.assertEqual(await self._search("a_", 10), ["a_b"])
+        self.assertEqual(await self._search("a\\", 10), ["a\\_b", "a\\b"])
+        self.assertEqual(await self._search("a\\_", 10), ["a\\_b"])
+
+
+class _ConcurrentDeleteTests:
+    """Tests for in-memory storages which return entries while other requests change storage."""
+
+    async def test_delete_while_iteration(self) -> None:
+        keys = [f"Имя {number:02d}" for number in range(10)]
+        await self._fill(keys)
+        found = []
+        async for key, value in self.storage.search_prefix("Имя", 20):
+            found.append(key)
+            if key == "Имя 02":
+                # Next key and key which was already returned are deleted.
+                await self.storage.delete_data("Имя 03")
+                await self.storage.delete_data("Имя 01")
+                await self.storage.set_data("Имя 025", "8-900")
+            self.assertEqual(value, await self.storage.get_data(key))
+        self.assertEqual(found, ["Имя 00", "Имя 01", "Имя 02", "Имя 025"] + keys[4:])
+
+
+class DictSearchPrefixTest(_SearchPrefixTests, _ConcurrentDeleteTests, unittest.IsolatedAsyncioTestCase):
+    def make_storage(self):
+        return DictRKSOKPhoneStorage()
+
+
+class ArenaSearchPrefixTest(_SearchPrefixTests, _ConcurrentDeleteTests, unittest.IsolatedAsyncioTestCase):
+    def make_storage(self):
+        return ArenaRKSOKPhoneStorage(arena_size=64)
+
+
+class PostgreSQLSearchPrefixTest(_SearchPrefixTests, unittest.IsolatedAsyncioTestCase):
+    def make_storage(self):
+        return _make_postgresql_storage()
+
+
+class ManagerSearchTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.storage = DictRKSOKPhoneStorage()
+        self.manager = RKSOKStorageManager(self.storage, search_result_limit=3)
+
+    async def _search(self, prefix: str) -> RKSOKCommand:
+        return await self.manager.get_response_for_request(RKSOKCommand(RequestVerb.SEARCH.value, key=prefix))
+
+    async def test_result_is_cut_by_limit(self) -> None:
+        for number in range(5):
+            await self.storage.set_data(f"Имя {number}", "8-900\r\n8-901")
+        response = await self._search("Имя*")
+        self.assertEqual(response.command(), ResponseStatus.OK.value)
+        self.assertEqual(response.value().split("\r\n"), ["Имя 0 — 8-900, 8-901", "Имя 1 — 8-900, 8-901", "Имя 2 — 8-900, 8-901", "..."])
+
+    async def test_result_equal_to_limit_is_not_cut(self) -> None:
+        for number in range(3):
+            await self.storage.set_data(f"Имя {number}", "8-900")
+        response = await self._search("Имя")
+        self.assertEqual(response.value().split("\r\n"), ["Имя 0 — 8-900", "Имя 1 — 8-900", "Имя 2 — 8-900"])
+
+    async def test_not_found_and_empty_prefix(self) -> None:
+        self.assertEqual((await self._search("Имя")).command(), ResponseStatus.NOTFOUND.value)
+        self.assertEqual((await self._search("*")).command(), ResponseStatus.INCORRECT_REQUEST.value)
+
+
+if __name__ == '__main__':
+    unittest.main()